@@ -1,16 +1,19 @@
 import logging
 import time
+from contextlib import contextmanager
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import NullPool
 from ..config import DATABASE_URL
 
 logger = logging.getLogger(__name__)
 
-# Create engine with connection pooling
+# Create engine with a bounded connection pool
 engine = create_engine(
     DATABASE_URL,
-    poolclass=NullPool,  # Disable pooling for Docker
+    pool_size=5,
+    max_overflow=15,
+    pool_pre_ping=True,  # Drop stale connections (e.g. after a Docker DB restart)
+    pool_recycle=1800,
     echo=False
 )
 
@@ -24,6 +27,18 @@ def get_session():
     finally:
         db.close()
 
+@contextmanager
+def session_scope():
+    """Context-managed session for use outside FastAPI dependencies"""
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 def init_db():
     """Initialize database tables"""
     try:
@@ -37,6 +37,7 @@ except Exception:
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 import os
@@ -88,6 +89,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON bodies (chart/news payloads run to hundreds of KB);
+# requests in the UI sends Accept-Encoding: gzip and decompresses transparently
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # ✅ CRITICAL: Include stocks router with proper prefix
 # This ensures /vn/charts is registered before /vn/{symbol}
 app.include_router(stocks_router, tags=["stocks"])
@@ -139,6 +144,15 @@ async def startup_event():
             if cleared > 0:
                 logger.info(f"🧹 Cleared {cleared} old failed cache files")
         
+        # ✅ Invalidate US quote cache after each market close
+        import asyncio
+        from .services.stock_us_service import run_quote_invalidation_scheduler
+        app.state.quote_invalidation_task = asyncio.create_task(run_quote_invalidation_scheduler())
+        
+        # ✅ Chart worker processes, spawned up front instead of mid-request
+        from .services.visualization_service import start_chart_pool
+        start_chart_pool()
+        
         # Wait for database
         if not wait_for_db(max_retries=12, retry_interval=5):
             logger.warning("Could not connect to database")
@@ -150,6 +164,16 @@ async def startup_event():
         logger.warning(f"Startup warning: {e}")
         # Don't fail startup, allow degraded mode
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and worker processes"""
+    task = getattr(app.state, "quote_invalidation_task", None)
+    if task:
+        task.cancel()
+    
+    from .services.visualization_service import shutdown_chart_pool
+    shutdown_chart_pool()
+
 @app.get("/", tags=["status"])
 async def root():
     return {"message": "Financial Chatbot API is running"}
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..database.connection import get_session
 from ..chains.chat_chain import create_chat_chain, process_user_query
+from ..utils.function_calling import clear_function_cache
 
 logger = logging.getLogger(__name__)
 
@@ -92,6 +93,16 @@ async def clear_session(session_id: str):
         logger.error(f"Error clearing session: {e}")
         return {"success": False, "error": str(e)}
 
+@router.post("/cache/clear")
+async def clear_tool_cache():
+    """Clear cached market data / YTD / search tool results"""
+    try:
+        clear_function_cache()
+        return {"success": True, "message": "Tool cache cleared"}
+    except Exception as e:
+        logger.error(f"Error clearing tool cache: {e}")
+        return {"success": False, "error": str(e)}
+
 @router.get("/history/{session_id}")
 async def get_history(session_id: str):
     """Get conversation history for a session"""
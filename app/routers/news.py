@@ -9,7 +9,7 @@ from ..database.connection import get_session
 from ..services.news_search_service import NewsSearchService
 from ..database.models import NewsArticle
 from ..rag.embeddings import create_embedding
-from ..utils.news_filter import is_valid_article_url, is_homepage_link, canonical_url, hash_title, extract_category
+from ..utils.news_filter import classify_article, canonical_url, hash_title, extract_category, SeenSet
 from ..utils.news_summarizer import summarize_article, summarize_article_direct
 
 logger = logging.getLogger(__name__)
@@ -110,8 +110,8 @@ async def search_news_on_demand(
         
         # Filter and deduplicate
         filtered_results = []
-        seen_urls = set()
-        seen_titles = set()
+        seen_urls = SeenSet()
+        seen_titles = SeenSet()
         
         for article in results:
             url = article.get('url', '')
@@ -132,11 +132,13 @@ async def search_news_on_demand(
             if article.get('source') == 'Unknown' or not article.get('source'):
                 article['source'] = extract_source_name(url)
             
-            if is_homepage_link(canonical):
+            verdict = classify_article(canonical, title)
+            
+            if verdict == "homepage":
                 logger.debug(f"⛔ Homepage: {url}")
                 continue
             
-            if not is_valid_article_url(canonical, title):
+            if verdict != "article":
                 logger.debug(f"⛔ Invalid: {url}")
                 continue
             
@@ -236,13 +238,15 @@ async def embed_article_endpoint(
             }
         
         # Validate
-        if is_homepage_link(canonical):
+        verdict = classify_article(canonical, request.title)
+        
+        if verdict == "homepage":
             return {
                 "success": False,
                 "error": "Homepage links are not allowed"
             }
         
-        if not is_valid_article_url(canonical, request.title):
+        if verdict != "article":
             return {
                 "success": False,
                 "error": "Invalid article URL"
@@ -286,11 +290,13 @@ async def process_and_embed_article(url: str, title: str, content: str, source:
     try:
         canonical = canonical_url(url)
         logger.info(f"📝 RAG check: {canonical[:60]}")
-        if is_homepage_link(canonical):
+        verdict = classify_article(canonical, title)
+        
+        if verdict == "homepage":
             logger.warning(f"⛔ Homepage rejected: {canonical}")
             return False
         
-        if not is_valid_article_url(canonical, title):
+        if verdict != "article":
             logger.warning(f"⛔ Invalid rejected: {canonical}")
             return False
         
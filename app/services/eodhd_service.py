@@ -74,6 +74,20 @@ class EODHDService:
         age = datetime.now().timestamp() - cache_path.stat().st_mtime
         return age < CACHE_TTL
     
+    @staticmethod
+    def invalidate_latest_cache(symbols: Optional[List[str]] = None, exchange: str = "US"):
+        """Remove latest-EOD cache files (all for the exchange if no symbols given)"""
+        if symbols is None:
+            cache_paths = CACHE_DIR.glob(f"*.{exchange}_latest.json")
+        else:
+            cache_paths = [EODHDService._get_cache_path(f"{s.upper()}.{exchange}") for s in symbols]
+        
+        for cache_path in cache_paths:
+            try:
+                cache_path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not remove cache {cache_path}: {e}")
+    
     @staticmethod
     def _read_cache(cache_path: Path) -> Optional[Dict]:
         try:
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from tavily import Client
 from ..config import TAVILY_API_KEY, NEWSDATA_API_KEY, NEWSAPI_KEY
 import hashlib
+from ..utils.news_filter import SeenSet
 
 logger = logging.getLogger(__name__)
 
@@ -201,8 +202,8 @@ class NewsSearchService:
         """
         ✅ IMPROVED: Better deduplication + strict date sorting
         """
-        seen_urls = set()
-        seen_titles = set()
+        seen_urls = SeenSet()
+        seen_titles = SeenSet()
         unique_results = []
         
         # ✅ CRITICAL: Sort by date (newest first)
@@ -233,10 +234,10 @@ class NewsSearchService:
                 continue
             
             # ✅ Check for duplicate titles (fuzzy)
-            title_hash = hashlib.md5(title.lower().encode()).hexdigest()
-            if title_hash in seen_titles:
+            title_key = title.lower()
+            if title_key in seen_titles:
                 continue
-            seen_titles.add(title_hash)
+            seen_titles.add(title_key)
             
             # ✅ Create snippet
             snippet = content[:500] + "..." if len(content) > 500 else content
@@ -2,28 +2,306 @@ import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 import pandas as pd
-import time
+import threading
 import asyncio
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+from cachetools import TLRUCache
 
 logger = logging.getLogger(__name__)
 
 from ..services.eodhd_service import EODHDService
 
-# Cache for quotes
-_us_quote_cache = {}
-_cache_ttl = 300 
+# NYSE regular session, Eastern Time
+_US_EASTERN = ZoneInfo("America/New_York")
+US_MARKET_OPEN = dtime(9, 30)
+US_MARKET_CLOSE = dtime(16, 0)
+# EODHD publishes the day's EOD record some time after the close; until then
+# a "latest EOD" lookup still returns the previous session
+US_EOD_PUBLISHED = dtime(16, 30)
+
+def is_us_market_open(now: Optional[datetime] = None) -> bool:
+    """Check if the US market is in its regular session"""
+    now = (now or datetime.now(_US_EASTERN)).astimezone(_US_EASTERN)
+    return now.weekday() < 5 and US_MARKET_OPEN <= now.time() < US_MARKET_CLOSE
+
+def _seconds_until_next(at: dtime) -> float:
+    """Seconds until the next weekday occurrence of `at` (Eastern Time)"""
+    now = datetime.now(_US_EASTERN)
+    target = now.replace(hour=at.hour, minute=at.minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    while target.weekday() >= 5:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+def _last_us_session_date():
+    """Date of the most recent completed US trading session (holidays ignored)"""
+    now = datetime.now(_US_EASTERN)
+    session = now.date()
+    if now.weekday() >= 5 or now.time() < US_MARKET_CLOSE:
+        session -= timedelta(days=1)
+    while session.weekday() >= 5:
+        session -= timedelta(days=1)
+    return session
+
+# Cache for quotes (bounded, stale entries are evicted automatically)
+# ✅ Per-entry TTL: short while trading and until the EOD record is published,
+# then until the next open. The cache is also invalidated once the EOD record
+# is published (see run_quote_invalidation_scheduler)
+_open_market_ttl = 60
+_closed_market_ttl = 24 * 3600
+_cache_maxsize = 10000
+
+def _quote_ttl() -> float:
+    """TTL for a quote cached now, based on market state"""
+    now = datetime.now(_US_EASTERN)
+    if is_us_market_open(now):
+        return _open_market_ttl
+    # Between the close and the EOD publish the record is still the previous
+    # session's - keep it short-lived so it isn't pinned until the next open
+    if now.weekday() < 5 and US_MARKET_CLOSE <= now.time() < US_EOD_PUBLISHED:
+        return _open_market_ttl
+    # Closed-market quotes don't change until the next session opens
+    return max(_open_market_ttl, min(_closed_market_ttl, _seconds_until_next(US_MARKET_OPEN)))
+
+def _quote_ttu(_key, _value, now: float) -> float:
+    return now + _quote_ttl()
+
+_us_quote_cache = TLRUCache(maxsize=_cache_maxsize, ttu=_quote_ttu)
+_us_quote_cache_lock = threading.RLock()
 
 def _get_cached_us_quote(symbol: str) -> Optional[Dict]:
     """Get cached US stock quote"""
-    if symbol in _us_quote_cache:
-        data, timestamp = _us_quote_cache[symbol]
-        if time.time() - timestamp < _cache_ttl:
-            return data
-    return None
+    with _us_quote_cache_lock:
+        return _us_quote_cache.get(symbol)
 
 def _set_cached_us_quote(symbol: str, data: Dict):
     """Cache US stock quote"""
-    _us_quote_cache[symbol] = (data, time.time())
+    with _us_quote_cache_lock:
+        _us_quote_cache[symbol] = data
+
+def invalidate_us_quotes(symbols: Optional[List[str]] = None):
+    """Drop cached US quotes (all of them if no symbols given)"""
+    with _us_quote_cache_lock:
+        if symbols is None:
+            _us_quote_cache.clear()
+        else:
+            for symbol in symbols:
+                _us_quote_cache.pop(symbol.upper(), None)
+    
+    # Drop the on-disk latest-EOD snapshots too, otherwise they are re-served
+    EODHDService.invalidate_latest_cache(symbols, "US")
+
+async def run_quote_invalidation_scheduler():
+    """Background task: invalidate US quotes once a day when the EOD print rolls"""
+    while True:
+        await asyncio.sleep(_seconds_until_next(US_EOD_PUBLISHED))
+        try:
+            invalidate_us_quotes()
+            logger.info("🧹 US EOD published - invalidated US quote cache")
+        except Exception as e:
+            logger.error(f"US quote invalidation failed: {e}")
+
+# Chart period -> number of days of history
+_PERIOD_DAYS = {
+    "1mo": 30,
+    "3mo": 90,
+    "6mo": 180,
+    "1y": 365
+}
+
+_REQUIRED_CANDLE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+def _validate_candles(df: pd.DataFrame) -> Optional[str]:
+    """Validate candle data, return the failure reason or None if valid"""
+    if not isinstance(df.index, pd.DatetimeIndex):
+        return "Index is not DatetimeIndex"
+    
+    if df.index[0].year < 2000:
+        return "Invalid timestamps"
+    
+    if df.columns.isin(_REQUIRED_CANDLE_COLUMNS).sum() != len(_REQUIRED_CANDLE_COLUMNS):
+        return "Missing columns"
+    
+    if df['close'].to_numpy().max() <= 0:
+        return "Invalid prices"
+    
+    return None
+
+def _stage_us_candles(db_session, symbol: str, df: pd.DataFrame) -> int:
+    """Insert candle rows for one symbol inside a savepoint, return inserted row count"""
+    from sqlalchemy import insert
+    from ..database.models import USStock
+    
+    # ✅ Plain row dicts + one executemany INSERT (no per-row ORM objects)
+    values = df[['open', 'close', 'high', 'low', 'volume']].astype('float64')
+    records = [
+        {
+            'symbol': symbol,
+            'open_price': open_price,
+            'close_price': close_price,
+            'high': high,
+            'low': low,
+            'volume': volume,
+            'timestamp': timestamp
+        }
+        for open_price, close_price, high, low, volume, timestamp in zip(
+            values['open'].tolist(),
+            values['close'].tolist(),
+            values['high'].tolist(),
+            values['low'].tolist(),
+            values['volume'].tolist(),
+            df.index.to_pydatetime()
+        )
+    ]
+    
+    if not records:
+        return 0
+    
+    try:
+        # ✅ Savepoint: a failing symbol only discards its own rows
+        with db_session.begin_nested():
+            db_session.execute(insert(USStock), records)
+        return len(records)
+    
+    except Exception as stage_error:
+        logger.error(f"❌ Failed to stage {symbol} rows: {stage_error}")
+        return 0
+
+def _save_us_candles(frames: Dict[str, pd.DataFrame]) -> int:
+    """Stage every symbol's candles (one savepoint each) and commit once, return saved row count"""
+    from ..database.connection import session_scope
+    
+    with session_scope() as db_session:
+        saved_count = 0
+        for symbol, df in frames.items():
+            saved_count += _stage_us_candles(db_session, symbol, df)
+        
+        if saved_count > 0:
+            try:
+                db_session.commit()
+                logger.info(f"✅ Saved {saved_count} records for {len(frames)} symbols to DB")
+            except Exception as commit_error:
+                db_session.rollback()
+                logger.error(f"❌ Commit failed: {commit_error}")
+                return 0
+        
+        return saved_count
+
+def _get_stored_session_eod(symbol: str) -> Optional[Dict]:
+    """Latest-EOD record for a symbol from the DB, if it covers the last session"""
+    from ..database.connection import session_scope
+    from ..database.models import USStock
+    
+    try:
+        with session_scope() as db_session:
+            row = (
+                db_session.query(USStock)
+                .filter(USStock.symbol == symbol)
+                .order_by(USStock.timestamp.desc())
+                .first()
+            )
+            
+            if row is None or row.timestamp is None:
+                return None
+            
+            if row.timestamp.date() != _last_us_session_date():
+                return None
+            
+            return {
+                'symbol': symbol,
+                'price': row.close_price,
+                'open': row.open_price,
+                'high': row.high,
+                'low': row.low,
+                'close': row.close_price,
+                'volume': row.volume,
+                'date': row.timestamp.strftime('%Y-%m-%d')
+            }
+    except Exception as e:
+        logger.warning(f"DB lookup failed for {symbol}: {e}")
+        return None
+
+# ✅ Request coalescing: single-symbol lookups arriving within a short window
+# share one EODHD batch call instead of one batch-of-1 call each
+_COALESCE_WINDOW = 0.02
+_pending_eod: Dict[str, asyncio.Future] = {}
+_pending_flush: Optional[asyncio.Task] = None
+
+async def _flush_pending_eod():
+    """Fetch all pending symbols in one batch call and resolve their futures"""
+    global _pending_flush
+    await asyncio.sleep(_COALESCE_WINDOW)
+    
+    pending = dict(_pending_eod)
+    _pending_eod.clear()
+    _pending_flush = None
+    
+    try:
+        results = await EODHDService.get_batch_latest_eod(list(pending), "US")
+    except Exception as e:
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(e)
+        return
+    
+    for symbol, future in pending.items():
+        if not future.done():
+            future.set_result(results.get(symbol))
+
+async def _get_latest_eod_coalesced(symbol: str) -> Optional[Dict]:
+    """Get latest EOD record for a symbol via the coalesced batch fetch"""
+    global _pending_flush
+    future = _pending_eod.get(symbol)
+    if future is None:
+        future = asyncio.get_running_loop().create_future()
+        _pending_eod[symbol] = future
+    
+    if _pending_flush is None:
+        _pending_flush = asyncio.create_task(_flush_pending_eod())
+    
+    # Shield: a cancelled caller must not cancel the result for other waiters
+    return await asyncio.shield(future)
+
+# Numeric fields of an EODHD latest-EOD record used to build quotes
+_QUOTE_FIELDS = ('price', 'close', 'high', 'low', 'open', 'volume')
+
+def _make_quote(
+    symbol: str,
+    price: float,
+    close: float,
+    high: float,
+    low: float,
+    open_price: float,
+    volume: float,
+    now: datetime
+) -> Dict:
+    """Build the quote dict shared by the single and batch lookup paths"""
+    return {
+        'symbol': symbol,
+        'price': price,
+        'current_price': close,
+        'high': high,
+        'low': low,
+        'open': open_price,
+        'open_price': open_price,
+        'previous_close': close,
+        'change': 0.0,  # Calculate if needed
+        'change_percent': 0.0,
+        'volume': volume,
+        'timestamp': now
+    }
+
+def _build_quote(symbol: str, data: Dict, now: Optional[datetime] = None) -> Dict:
+    """Build a quote dict from an EODHD latest-EOD record"""
+    g = data.get
+    return _make_quote(
+        symbol,
+        # `or 0`: nullable DB columns arrive as None, not missing keys
+        *(float(g(field) or 0) for field in _QUOTE_FIELDS),
+        now or datetime.now()
+    )
 
 class USStockService:
     """
@@ -44,29 +322,22 @@ class USStockService:
             if cached:
                 return cached
             
-            # ✅ Use EODHD batch endpoint (even for 1 symbol - it's cached!)
-            results = await EODHDService.get_batch_latest_eod([symbol], "US")
+            data = None
             
-            data = results.get(symbol)
+            # ✅ Market closed: the last session's EOD print is final, serve it
+            # from the DB if it's already stored
+            if not is_us_market_open():
+                data = await asyncio.to_thread(_get_stored_session_eod, symbol)
+            
+            # ✅ Use EODHD batch endpoint, coalesced with concurrent lookups
+            if not data:
+                data = await _get_latest_eod_coalesced(symbol)
             
             if not data:
                 return None
             
             # ✅ Format result
-            result = {
-                'symbol': symbol,
-                'price': float(data.get('price', 0)),
-                'current_price': float(data.get('close', 0)),
-                'high': float(data.get('high', 0)),
-                'low': float(data.get('low', 0)),
-                'open': float(data.get('open', 0)),
-                'open_price': float(data.get('open', 0)),
-                'previous_close': float(data.get('close', 0)),
-                'change': 0.0,  # Calculate if needed
-                'change_percent': 0.0,
-                'volume': float(data.get('volume', 0)),
-                'timestamp': datetime.now()
-            }
+            result = _build_quote(symbol, data)
             
             _set_cached_us_quote(symbol, result)
             
@@ -101,6 +372,10 @@ class USStockService:
                 logger.warning(f"⚠️ No data from EODHD for {symbol}")
                 return None
             
+            # ✅ Consolidate into contiguous per-dtype blocks so the column
+            # reductions done for stats/charts scan contiguous memory
+            df = df.copy()
+            
             logger.info(f"✅ {symbol}: {len(df)} records")
             
             return df
@@ -115,11 +390,11 @@ class USStockService:
         ✅ OPTIMIZED: Batch request for multiple stocks (1 API call!)
         """
         results = {}
+        symbols = [s.upper() for s in symbols]
         
         # Check cache first
         uncached_symbols = []
         for symbol in symbols:
-            symbol = symbol.upper()
             cached = _get_cached_us_quote(symbol)
             if cached:
                 results[symbol] = cached
@@ -134,22 +409,31 @@ class USStockService:
         
         batch_results = await EODHDService.get_batch_latest_eod(uncached_symbols, "US")
         
+        now = datetime.now()
+        found = {}
         for symbol, data in batch_results.items():
+            results[symbol] = None
             if data:
-                result = {
-                    'symbol': symbol,
-                    'price': float(data.get('price', 0)),
-                    'current_price': float(data.get('close', 0)),
-                    'high': float(data.get('high', 0)),
-                    'low': float(data.get('low', 0)),
-                    'open': float(data.get('open', 0)),
-                    'volume': float(data.get('volume', 0)),
-                    'timestamp': datetime.now()
-                }
-                _set_cached_us_quote(symbol, result)
-                results[symbol] = result
-            else:
-                results[symbol] = None
+                found[symbol] = data
+        
+        if not found:
+            return results
+        
+        # ✅ Convert all numeric fields in one columnar pass
+        frame = (
+            pd.DataFrame.from_dict(found, orient='index')
+            .reindex(columns=_QUOTE_FIELDS)
+            .apply(pd.to_numeric, errors='coerce')
+            .fillna(0.0)
+            .astype('float64')
+        )
+        
+        for symbol, price, close, high, low, open_price, volume in zip(
+            frame.index, *(frame[field].tolist() for field in _QUOTE_FIELDS)
+        ):
+            result = _make_quote(symbol, price, close, high, low, open_price, volume, now)
+            _set_cached_us_quote(symbol, result)
+            results[symbol] = result
         
         return results
     
@@ -159,17 +443,11 @@ class USStockService:
         ✅ CRITICAL FIX: Save data to DB while generating charts
         """
         try:
-            from .visualization_service import StockVisualizer
+            from .visualization_service import StockVisualizer, run_chart_job
             
+            symbols = [s.upper() for s in symbols]
             end_date = datetime.now()
-            period_map = {
-                "1mo": 30,
-                "3mo": 90,
-                "6mo": 180,
-                "1y": 365
-            }
-            
-            days = period_map.get(period, 30)
+            days = _PERIOD_DAYS.get(period, 30)
             start_date = end_date - timedelta(days=days)
             
             start_date_str = start_date.strftime('%Y-%m-%d')
@@ -179,120 +457,69 @@ class USStockService:
             symbol_stats = {}
             failed_symbols = []
             
-            # ✅ NEW: Import session management
-            from ..database.connection import get_session
-            from ..database.models import USStock
-            
-            # ✅ Get DB session
-            db_session = next(get_session())
-            
-            try:
-                for symbol in symbols:
-                    symbol = symbol.upper()
+            for symbol in symbols:
+                try:
+                    logger.info(f"Processing {symbol}...")
                     
-                    try:
-                        logger.info(f"Processing {symbol}...")
-                        
-                        df = await asyncio.wait_for(
-                            USStockService.get_us_stock_candles(
-                                symbol,
-                                start_date_str,
-                                end_date_str
-                            ),
-                            timeout=30
-                        )
-                        
-                        if df is None or df.empty:
-                            logger.warning(f"No data for {symbol}")
-                            failed_symbols.append(symbol)
-                            continue
-                        
-                        # ✅ VALIDATE: Check timestamp
-                        if not isinstance(df.index, pd.DatetimeIndex):
-                            logger.warning(f"⚠️ {symbol}: Index is not DatetimeIndex")
-                            failed_symbols.append(symbol)
-                            continue
-                        
-                        if df.index[0].year < 2000:
-                            logger.error(f"❌ {symbol}: Invalid timestamps")
-                            failed_symbols.append(symbol)
-                            continue
-                        
-                        # ✅ Validate columns
-                        required_cols = ['open', 'high', 'low', 'close', 'volume']
-                        if not all(col in df.columns for col in required_cols):
-                            logger.error(f"❌ {symbol}: Missing columns")
-                            failed_symbols.append(symbol)
-                            continue
-                        
-                        if df['close'].max() <= 0:
-                            logger.error(f"❌ {symbol}: Invalid prices")
-                            failed_symbols.append(symbol)
-                            continue
-                        
-                        # ✅ CRITICAL: SAVE TO DATABASE
-                        saved_count = 0
-                        for idx, row in df.iterrows():
-                            try:
-                                us_stock = USStock(
-                                    symbol=symbol,
-                                    open_price=float(row['open']),
-                                    close_price=float(row['close']),
-                                    high=float(row['high']),
-                                    low=float(row['low']),
-                                    volume=float(row['volume']),
-                                    timestamp=idx  # idx is already datetime
-                                )
-                                db_session.add(us_stock)
-                                saved_count += 1
-                            except Exception as row_error:
-                                logger.error(f"Failed to save row for {symbol}: {row_error}")
-                                continue
-                        
-                        # ✅ Commit per symbol
-                        if saved_count > 0:
-                            try:
-                                db_session.commit()
-                                logger.info(f"✅ Saved {saved_count} records for {symbol} to DB")
-                            except Exception as commit_error:
-                                db_session.rollback()
-                                logger.error(f"❌ Commit failed for {symbol}: {commit_error}")
-                        
-                        # Continue with visualization
-                        symbol_dataframes[symbol] = df
-                        
-                        latest = df.iloc[-1]
-                        first = df.iloc[0]
-                        price_change = latest['close'] - first['close']
-                        price_change_pct = (price_change / first['close']) * 100
-                        
-                        symbol_stats[symbol] = {
-                            'latest_price': float(latest['close']),
-                            'open': float(latest['open']),
-                            'high': float(df['high'].max()),
-                            'low': float(df['low'].min()),
-                            'volume': float(latest['volume']),
-                            'change': float(price_change),
-                            'change_percent': float(price_change_pct),
-                            'period_high': float(df['high'].max()),
-                            'period_low': float(df['low'].min()),
-                            'avg_volume': float(df['volume'].mean())
-                        }
-                        
-                        logger.info(f"✅ {symbol}: ${latest['close']:.2f} ({price_change_pct:+.2f}%)")
-                        
-                    except asyncio.TimeoutError:
-                        logger.error(f"Timeout for {symbol}")
+                    df = await asyncio.wait_for(
+                        USStockService.get_us_stock_candles(
+                            symbol,
+                            start_date_str,
+                            end_date_str
+                        ),
+                        timeout=30
+                    )
+                    
+                    if df is None or df.empty:
+                        logger.warning(f"No data for {symbol}")
                         failed_symbols.append(symbol)
                         continue
-                    except Exception as e:
-                        logger.error(f"Error for {symbol}: {e}")
+                    
+                    # ✅ VALIDATE: Index, columns and prices in one pass
+                    invalid_reason = _validate_candles(df)
+                    if invalid_reason:
+                        logger.error(f"❌ {symbol}: {invalid_reason}")
                         failed_symbols.append(symbol)
                         continue
-                
-            finally:
-                # ✅ Close DB session
-                db_session.close()
+                    
+                    symbol_dataframes[symbol] = df
+                    
+                    latest = df.iloc[-1]
+                    first = df.iloc[0]
+                    price_change = latest['close'] - first['close']
+                    price_change_pct = (price_change / first['close']) * 100
+                    
+                    period_high = float(df['high'].max())
+                    period_low = float(df['low'].min())
+                    
+                    symbol_stats[symbol] = {
+                        'latest_price': float(latest['close']),
+                        'open': float(latest['open']),
+                        'high': period_high,
+                        'low': period_low,
+                        'volume': float(latest['volume']),
+                        'change': float(price_change),
+                        'change_percent': float(price_change_pct),
+                        'period_high': period_high,
+                        'period_low': period_low,
+                        'avg_volume': float(df['volume'].mean())
+                    }
+                    
+                    logger.info(f"✅ {symbol}: ${latest['close']:.2f} ({price_change_pct:+.2f}%)")
+                    
+                except asyncio.TimeoutError:
+                    logger.error(f"Timeout for {symbol}")
+                    failed_symbols.append(symbol)
+                    continue
+                except Exception as e:
+                    logger.error(f"Error for {symbol}: {e}")
+                    failed_symbols.append(symbol)
+                    continue
+            
+            # ✅ CRITICAL: SAVE TO DATABASE - one short session after all the
+            # fetches, so no connection/transaction is held across API calls
+            if symbol_dataframes:
+                await asyncio.to_thread(_save_us_candles, symbol_dataframes)
             
             # ...existing chart generation...
             
@@ -303,22 +530,31 @@ class USStockService:
                     "failed_symbols": failed_symbols
                 }
             
-            charts = {}
-            visualizer = StockVisualizer()
+            # ✅ Render all charts concurrently in the chart worker pool
+            chart_jobs = {}
             
             for symbol, df in symbol_dataframes.items():
-                try:
-                    logger.info(f"📊 Creating charts for {symbol}...")
-                    charts[f"{symbol}_candlestick"] = visualizer.create_candlestick_chart(df, symbol)
-                    charts[f"{symbol}_technical"] = visualizer.create_technical_analysis_chart(df, symbol)
-                except Exception as chart_error:
-                    logger.error(f"Chart creation failed for {symbol}: {chart_error}")
+                logger.info(f"📊 Creating charts for {symbol}...")
+                chart_jobs[f"{symbol}_candlestick"] = run_chart_job(
+                    StockVisualizer.create_candlestick_chart, df, symbol
+                )
+                chart_jobs[f"{symbol}_technical"] = run_chart_job(
+                    StockVisualizer.create_technical_analysis_chart, df, symbol
+                )
             
             if len(symbol_dataframes) > 1:
-                try:
-                    charts["comparison"] = visualizer.create_multi_stock_comparison(symbol_dataframes)
-                except Exception as comp_error:
-                    logger.error(f"Comparison chart failed: {comp_error}")
+                chart_jobs["comparison"] = run_chart_job(
+                    StockVisualizer.create_multi_stock_comparison, symbol_dataframes
+                )
+            
+            charts = {}
+            chart_results = await asyncio.gather(*chart_jobs.values(), return_exceptions=True)
+            
+            for chart_name, chart in zip(chart_jobs, chart_results):
+                if isinstance(chart, Exception):
+                    logger.error(f"Chart creation failed for {chart_name}: {chart}")
+                else:
+                    charts[chart_name] = chart
             
             result = {
                 'symbols': list(symbol_dataframes.keys()),
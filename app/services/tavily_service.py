@@ -1,4 +1,5 @@
 import logging
+import asyncio
 from typing import Optional, Dict, Any
 from datetime import datetime
 from tavily import Client
@@ -6,6 +7,16 @@ from ..config import TAVILY_API_KEY
 
 logger = logging.getLogger(__name__)
 
+# Shared client so HTTP connections are reused across searches
+_tavily_client: Optional[Client] = None
+
+def _get_client() -> Client:
+    """Get (lazily create) the shared Tavily client"""
+    global _tavily_client
+    if _tavily_client is None:
+        _tavily_client = Client(api_key=TAVILY_API_KEY)
+    return _tavily_client
+
 class TavilySearch:
     """Tavily API wrapper for financial news search"""
     
@@ -17,13 +28,14 @@ class TavilySearch:
                 logger.warning("Tavily API key not configured")
                 return {"results": [], "error": "Tavily not configured"}
             
-            client = Client(api_key=TAVILY_API_KEY)
+            client = _get_client()
             
             search_query = f"{query} financial news market"
             if category:
                 search_query += f" {category}"
             
-            response = client.search(search_query, max_results=10)
+            # Tavily client is synchronous - run it off the event loop
+            response = await asyncio.to_thread(client.search, search_query, max_results=10)
             
             return {
                 "results": response.get("results", []),
@@ -1,12 +1,126 @@
 import logging
-from typing import List, Dict, Optional
+import os
+import asyncio
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Callable
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import json
+from cachetools import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# ✅ Serialize figures with orjson (numpy arrays/datetimes encoded in C)
+pio.json.config.default_engine = 'orjson'
+
+def _fig_to_json(fig) -> str:
+    """Serialize a figure we built ourselves (no re-validation needed)"""
+    if isinstance(fig, go.Figure):
+        # go.Figure inlines the whole named template (~10KB); ship just the
+        # name, the client's go.Figure() resolves it again
+        fig = fig.to_dict()
+        fig['layout']['template'] = DARK_THEME['template']
+    return pio.to_json(fig, validate=False, pretty=False, engine='orjson')
+
+# ✅ Chart JSON memo: charts are pure functions of (symbol, frame), keyed on a
+# cheap frame fingerprint (last timestamp, row count, last close)
+_chart_cache = LRUCache(maxsize=256)
+_chart_cache_lock = threading.Lock()
+
+def _frame_fingerprint(df: pd.DataFrame, symbol: str) -> Optional[tuple]:
+    """Cheap identity for a symbol's OHLCV frame, None if it can't be fingerprinted"""
+    if not isinstance(df, pd.DataFrame) or df.empty or 'close' not in df.columns:
+        return None
+    
+    try:
+        last_timestamp = pd.Timestamp(df.index[-1]).value
+        return (symbol, last_timestamp, len(df), float(df['close'].iloc[-1]))
+    except Exception:
+        return None
+
+def _chart_cache_key(chart_func: Callable[..., str], args: tuple) -> Optional[tuple]:
+    """Fingerprint for (df, symbol) chart calls, None if the call isn't cacheable"""
+    if len(args) != 2:
+        return None
+    
+    fingerprint = _frame_fingerprint(*args)
+    if fingerprint is None:
+        return None
+    return (chart_func.__qualname__, *fingerprint)
+
+def _get_cached_chart(key: Optional[tuple]) -> Optional[str]:
+    if key is None:
+        return None
+    with _chart_cache_lock:
+        return _chart_cache.get(key)
+
+def _set_cached_chart(key: Optional[tuple], chart: str):
+    if key is None or not chart:
+        return
+    with _chart_cache_lock:
+        _chart_cache[key] = chart
+
+def _memoized_chart(chart_func: Callable[..., str]) -> Callable[..., str]:
+    """Memoize a (df, symbol) -> chart JSON builder on the frame fingerprint"""
+    @functools.wraps(chart_func)
+    def wrapper(df: pd.DataFrame, symbol: str) -> str:
+        key = _chart_cache_key(chart_func, (df, symbol))
+        cached = _get_cached_chart(key)
+        if cached:
+            return cached
+        
+        chart = chart_func(df, symbol)
+        _set_cached_chart(key, chart)
+        return chart
+    
+    return wrapper
+
+# Worker processes for chart rendering (Plotly figure building is CPU-bound).
+# Spawned, not forked: the server already runs threads, and a child forked
+# while one of them holds a lock (logging, caches) can deadlock
+_chart_pool: Optional[ProcessPoolExecutor] = None
+
+def start_chart_pool() -> ProcessPoolExecutor:
+    """Create the chart worker pool (called from the app startup hook)"""
+    global _chart_pool
+    if _chart_pool is None:
+        _chart_pool = ProcessPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _chart_pool
+
+def shutdown_chart_pool():
+    """Stop the chart worker pool (called from the app shutdown hook)"""
+    global _chart_pool
+    if _chart_pool is not None:
+        _chart_pool.shutdown(wait=False, cancel_futures=True)
+        _chart_pool = None
+
+def _get_chart_pool() -> ProcessPoolExecutor:
+    """Get the chart worker pool (created on demand outside the app, e.g. scripts)"""
+    return _chart_pool or start_chart_pool()
+
+async def run_chart_job(chart_func: Callable[..., str], *args) -> str:
+    """Run a chart builder in the worker pool without blocking the event loop"""
+    # Check the memo here too, so cache hits skip pickling the frame to a worker
+    key = _chart_cache_key(chart_func, args)
+    cached = _get_cached_chart(key)
+    if cached:
+        return cached
+    
+    loop = asyncio.get_running_loop()
+    chart = await loop.run_in_executor(_get_chart_pool(), chart_func, *args)
+    _set_cached_chart(key, chart)
+    return chart
+
 DARK_THEME = {
     'template': 'plotly_dark',
     'paper_bgcolor': '#1e1e1e',
@@ -16,292 +130,468 @@ DARK_THEME = {
     'yaxis': {'gridcolor': '#3e3e3e', 'showgrid': True}
 }
 
+def _ensure_datetime_index(df: pd.DataFrame):
+    """Make df.index a DatetimeIndex, parsing strings only when there are any"""
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        return
+    if index.dtype.kind == 'M':
+        # Already datetime64 values under a generic Index - just rewrap
+        df.index = pd.DatetimeIndex(index.values, copy=False)
+    else:
+        df.index = pd.to_datetime(index, cache=True)
+
+def _x_values(index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Shared x array for every trace of a chart: a datetime64 ndarray, which
+    orjson encodes natively instead of formatting each Timestamp
+    """
+    if index.tz is not None:
+        # Plotly draws wall-clock time and ignores the offset anyway
+        index = index.tz_localize(None)
+    return index.values
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean (NaN until the window is full)"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    return out
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling sample std (NaN until the window is full)"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window).std(axis=1, ddof=1)
+    return out
+
+# Above this length pandas' C ewm beats the Python recurrence
+_EMA_VECTORIZE_MIN = 500
+
+def ema_step(prev: Optional[float], value: float, span: int) -> float:
+    """One EMA update (for appending a new bar without recomputing the series)"""
+    if prev is None:
+        return value
+    return prev + 2 / (span + 1) * (value - prev)
+
+def _smooth(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponential smoothing, same as pandas ewm(alpha=alpha, adjust=False)"""
+    if len(values) >= _EMA_VECTORIZE_MIN:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    
+    # Short series: single-pass recurrence, no pandas overhead
+    out = np.empty(len(values))
+    smoothed = None
+    for i, value in enumerate(values.tolist()):
+        smoothed = value if smoothed is None else smoothed + alpha * (value - smoothed)
+        out[i] = smoothed
+    return out
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    """EMA, same as pandas ewm(span=span, adjust=False)"""
+    return _smooth(values, 2 / (span + 1))
+
+def _wilder_rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    RSI with Wilder's smoothing. The averages are an EMA with alpha=1/period
+    seeded with the simple mean of the first `period` gains/losses
+    """
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    
+    deltas = np.diff(close)
+    gains = np.maximum(deltas, 0.0)
+    losses = np.maximum(-deltas, 0.0)
+    
+    alpha = 1 / period
+    avg_gain = _smooth(np.concatenate(([gains[:period].mean()], gains[period:])), alpha)
+    avg_loss = _smooth(np.concatenate(([losses[:period].mean()], losses[period:])), alpha)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    
+    # No losses in the window: 100 if there were gains, undefined if flat
+    no_loss = avg_loss == 0
+    rsi[no_loss] = np.where(avg_gain[no_loss] > 0, 100.0, np.nan)
+    
+    out[period:] = rsi
+    return out
+
+def _f32(values) -> np.ndarray:
+    """float32 copy for trace data: ~7 significant digits is plenty on screen
+    and encodes to roughly half the JSON of float64"""
+    return np.asarray(values, dtype=np.float32)
+
+def _volume_array(volume) -> np.ndarray:
+    """Whole-share volumes as int64 (no '.0' per bar in the JSON)"""
+    return np.nan_to_num(np.asarray(volume, dtype='float64')).astype(np.int64)
+
+# Line charts above this many bars are downsampled before encoding
+_MAX_LINE_POINTS = 2000
+
+def _lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of the n_out points that best
+    preserve the visual shape of a series (first and last always kept)
+    """
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    y = np.nan_to_num(np.asarray(values, dtype='float64'))
+    every = (n - 2) / (n_out - 2)
+    
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+    
+    for i in range(n_out - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = y[next_start:next_end].mean()
+        
+        start = int(i * every) + 1
+        end = next_start
+        xs = np.arange(start, end)
+        areas = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        
+        a = start + int(areas.argmax())
+        indices[i + 1] = a
+    
+    indices[-1] = n - 1
+    return indices
+
+def compute_indicators(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Technical indicators for a close-price array, computed on numpy arrays:
+    SMA20 + Bollinger Bands, RSI(14) and MACD(12, 26, 9)
+    """
+    sma20 = _rolling_mean(close, 20)
+    std20 = _rolling_std(close, 20)
+    
+    rsi = _wilder_rsi(close, 14)
+    
+    macd = _ema(close, 12) - _ema(close, 26)
+    signal = _ema(macd, 9)
+    
+    return {
+        'sma20': sma20,
+        'upper_bb': sma20 + std20 * 2,
+        'lower_bb': sma20 - std20 * 2,
+        'rsi': rsi,
+        'macd': macd,
+        'signal': signal,
+        'histogram': macd - signal
+    }
+
+def _subplot_axes(row_heights: List[float], vertical_spacing: float, subplot_titles: List[str]) -> Dict:
+    """
+    Layout axes for a single-column subplot grid with shared x axes
+    (same geometry make_subplots produces, without building a go.Figure)
+    """
+    rows = len(row_heights)
+    available = 1 - vertical_spacing * (rows - 1)
+    total = sum(row_heights)
+    
+    layout = {'annotations': []}
+    top = 1.0
+    
+    for row, (height, title) in enumerate(zip(row_heights, subplot_titles), start=1):
+        bottom = round(max(top - available * height / total, 0.0), 12)
+        suffix = '' if row == 1 else str(row)
+        
+        xaxis = {'anchor': f'y{suffix}', 'domain': [0.0, 1.0]}
+        if row < rows:
+            xaxis['matches'] = f'x{rows}'
+            xaxis['showticklabels'] = False
+        
+        layout[f'xaxis{suffix}'] = xaxis
+        layout[f'yaxis{suffix}'] = {'anchor': f'x{suffix}', 'domain': [bottom, top]}
+        layout['annotations'].append({
+            'font': {'size': 16},
+            'showarrow': False,
+            'text': title,
+            'x': 0.5,
+            'xanchor': 'center',
+            'xref': 'paper',
+            'y': top,
+            'yanchor': 'bottom',
+            'yref': 'paper'
+        })
+        
+        top = round(bottom - vertical_spacing, 12)
+    
+    return layout
+
+def _hline(y: float, row: int, **line) -> Dict:
+    """Horizontal line shape spanning one subplot row"""
+    suffix = '' if row == 1 else str(row)
+    return {
+        'type': 'line',
+        'line': line,
+        'x0': 0, 'x1': 1, 'xref': f'x{suffix} domain',
+        'y0': y, 'y1': y, 'yref': f'y{suffix}'
+    }
+
+def _hline_label(y: float, row: int, text: str) -> Dict:
+    """Right-aligned label for a horizontal line (add_hline annotation_text)"""
+    suffix = '' if row == 1 else str(row)
+    return {
+        'showarrow': False,
+        'text': text,
+        'x': 1, 'xanchor': 'right', 'xref': f'x{suffix} domain',
+        'y': y, 'yanchor': 'bottom', 'yref': f'y{suffix}'
+    }
+
+# ✅ Shared dark layout, built once at import. Charts extend a shallow copy;
+# the nested dicts are shared and must not be mutated. Axes only carry the
+# grid color - showgrid is already on by default for cartesian axes
+_GRID_AXIS = {'gridcolor': DARK_THEME['xaxis']['gridcolor']}
+_BASE_LAYOUT = {
+    'template': DARK_THEME['template'],
+    'paper_bgcolor': DARK_THEME['paper_bgcolor'],
+    'plot_bgcolor': DARK_THEME['plot_bgcolor'],
+    'font': DARK_THEME['font'],
+    'showlegend': True,
+    'legend': {
+        'orientation': 'h',
+        'yanchor': 'bottom',
+        'y': 1.02,
+        'xanchor': 'right',
+        'x': 1
+    },
+    'margin': {'l': 50, 'r': 50, 't': 80, 'b': 50}
+}
+
+def _chart_layout(height: int, **overrides) -> Dict:
+    """Dark theme layout shared by all charts"""
+    return {**_BASE_LAYOUT, 'height': height, **overrides}
+
 class StockVisualizer:
     
     @staticmethod
+    @_memoized_chart
     def create_candlestick_chart(df: pd.DataFrame, symbol: str) -> str:
         """
         Create interactive candlestick chart with volume using Plotly
+        (traces/layout built as plain dicts - no go.Figure validation)
         """
         try:
-            if not isinstance(df.index, pd.DatetimeIndex):
-                df.index = pd.to_datetime(df.index)
-            
-            fig = make_subplots(
-                rows=2, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                row_heights=[0.7, 0.3],
-                subplot_titles=(f'{symbol} - Candlestick Chart', 'Volume')
-            )
-            
-            fig.add_trace(
-                go.Candlestick(
-                    x=df.index,
-                    open=df['open'],
-                    high=df['high'],
-                    low=df['low'],
-                    close=df['close'],
-                    name='Price',
-                    increasing_line_color='#26a69a',
-                    decreasing_line_color='#ef5350'
-                ),
-                row=1, col=1
-            )
+            _ensure_datetime_index(df)
+            
+            # Only the SMAs are drawn here - don't pay for RSI/MACD/BB (chart
+            # jobs run in separate worker processes, so nothing is shared)
+            close = df['close'].to_numpy(dtype='float64')
+            x = _x_values(df.index)
+            
+            data = [
+                {
+                    'type': 'candlestick',
+                    'xaxis': 'x', 'yaxis': 'y',
+                    'x': x,
+                    'open': _f32(df['open']),
+                    'high': _f32(df['high']),
+                    'low': _f32(df['low']),
+                    'close': _f32(close),
+                    'name': 'Price',
+                    'increasing': {'line': {'color': '#26a69a'}},
+                    'decreasing': {'line': {'color': '#ef5350'}}
+                }
+            ]
             
             if len(df) >= 20:
-                df['SMA20'] = df['close'].rolling(window=20).mean()
-                fig.add_trace(
-                    go.Scatter(
-                        x=df.index,
-                        y=df['SMA20'],
-                        name='SMA 20',
-                        line=dict(color='orange', width=1.5)
-                    ),
-                    row=1, col=1
-                )
+                data.append({
+                    'type': 'scatter',
+                    'xaxis': 'x', 'yaxis': 'y',
+                    'x': x,
+                    'y': _f32(_rolling_mean(close, 20)),
+                    'name': 'SMA 20',
+                    'line': {'color': 'orange', 'width': 1.5}
+                })
             
             if len(df) >= 50:
-                df['SMA50'] = df['close'].rolling(window=50).mean()
-                fig.add_trace(
-                    go.Scatter(
-                        x=df.index,
-                        y=df['SMA50'],
-                        name='SMA 50',
-                        line=dict(color='blue', width=1.5)
-                    ),
-                    row=1, col=1
-                )
-            
-            colors = ['#26a69a' if df['close'].iloc[i] >= df['open'].iloc[i] else '#ef5350' 
-                     for i in range(len(df))]
-            
-            fig.add_trace(
-                go.Bar(
-                    x=df.index,
-                    y=df['volume'],
-                    name='Volume',
-                    marker_color=colors,
-                    opacity=0.6
-                ),
-                row=2, col=1
-            )
-            
-            fig.update_layout(
-                template='plotly_dark',
-                paper_bgcolor='#1e1e1e',
-                plot_bgcolor='#1e1e1e',
-                font=dict(color='#e0e0e0', size=12),
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                ),
-                xaxis_rangeslider_visible=False,
-                height=600,
-                margin=dict(l=50, r=50, t=80, b=50)
-            )
-            
-            fig.update_xaxes(
-                gridcolor='#3e3e3e',
-                showgrid=True,
-                row=2, col=1
-            )
+                data.append({
+                    'type': 'scatter',
+                    'xaxis': 'x', 'yaxis': 'y',
+                    'x': x,
+                    'y': _f32(_rolling_mean(close, 50)),
+                    'name': 'SMA 50',
+                    'line': {'color': 'blue', 'width': 1.5}
+                })
+            
+            colors = np.where(
+                close >= df['open'].to_numpy(), '#26a69a', '#ef5350'
+            ).tolist()
+            
+            data.append({
+                'type': 'bar',
+                'xaxis': 'x2', 'yaxis': 'y2',
+                'x': x,
+                'y': _volume_array(df['volume']),
+                'name': 'Volume',
+                'marker': {'color': colors},
+                'opacity': 0.6
+            })
+            
+            layout = _chart_layout(height=600)
+            layout.update(_subplot_axes(
+                row_heights=[0.7, 0.3],
+                vertical_spacing=0.03,
+                subplot_titles=[f'{symbol} - Candlestick Chart', 'Volume']
+            ))
             
-            fig.update_yaxes(
-                title_text="Price (x1,000 VND)",
-                gridcolor='#3e3e3e',
-                showgrid=True,
-                row=1, col=1
-            )
+            layout['xaxis']['rangeslider'] = {'visible': False}
+            layout['xaxis2'].update(_GRID_AXIS)
+            layout['yaxis'].update(_GRID_AXIS, title={'text': "Price (x1,000 VND)"})
+            layout['yaxis2'].update(_GRID_AXIS, title={'text': "Volume"})
             
-            fig.update_yaxes(
-                title_text="Volume",
-                gridcolor='#3e3e3e',
-                showgrid=True,
-                row=2, col=1
-            )
-            
-            return fig.to_json()
+            return _fig_to_json({'data': data, 'layout': layout})
             
         except Exception as e:
             logger.error(f"Error creating candlestick chart: {e}")
             return ""
     
     @staticmethod
+    @_memoized_chart
     def create_technical_analysis_chart(df: pd.DataFrame, symbol: str) -> str:
         """
         Create interactive technical analysis chart with RSI and MACD
+        (traces/layout built as plain dicts - no go.Figure validation)
         """
         try:
-            if not isinstance(df.index, pd.DatetimeIndex):
-                df.index = pd.to_datetime(df.index)
-            
-            fig = make_subplots(
-                rows=3, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.05,
+            _ensure_datetime_index(df)
+            
+            close = df['close'].to_numpy(dtype='float64')
+            indicators = compute_indicators(close)
+            x = df.index
+            
+            # Indicators are computed at full resolution, then every line is
+            # downsampled at the same indices so traces stay aligned
+            if len(df) > _MAX_LINE_POINTS:
+                keep = _lttb_indices(close, _MAX_LINE_POINTS)
+                x = x[keep]
+                close = close[keep]
+                indicators = {name: series[keep] for name, series in indicators.items()}
+            
+            x = _x_values(x)
+            close = _f32(close)
+            indicators = {name: _f32(series) for name, series in indicators.items()}
+            
+            data = [
+                {
+                    'type': 'scatter',
+                    'xaxis': 'x', 'yaxis': 'y',
+                    'x': x,
+                    'y': close,
+                    'name': 'Close Price',
+                    'line': {'color': 'white', 'width': 1.5}
+                },
+                {
+                    'type': 'scatter',
+                    'xaxis': 'x', 'yaxis': 'y',
+                    'x': x,
+                    'y': indicators['sma20'],
+                    'name': 'SMA 20',
+                    'line': {'color': 'blue', 'width': 1}
+                },
+                {
+                    'type': 'scatter',
+                    'xaxis': 'x', 'yaxis': 'y',
+                    'x': x,
+                    'y': indicators['upper_bb'],
+                    'name': 'Upper BB',
+                    'line': {'color': 'gray', 'width': 1, 'dash': 'dash'},
+                    'showlegend': False
+                },
+                {
+                    'type': 'scatter',
+                    'xaxis': 'x', 'yaxis': 'y',
+                    'x': x,
+                    'y': indicators['lower_bb'],
+                    'name': 'Lower BB',
+                    'line': {'color': 'gray', 'width': 1, 'dash': 'dash'},
+                    'fill': 'tonexty',
+                    'fillcolor': 'rgba(128,128,128,0.2)',
+                    'showlegend': False
+                }
+            ]
+            
+            layout = _chart_layout(height=800)
+            layout.update(_subplot_axes(
                 row_heights=[0.5, 0.25, 0.25],
-                subplot_titles=(
-                    f'{symbol} - Technical Analysis',
-                    'RSI (14)',
-                    'MACD'
-                )
-            )
-            
-            df['SMA20'] = df['close'].rolling(window=20).mean()
-            df['std20'] = df['close'].rolling(window=20).std()
-            df['Upper_BB'] = df['SMA20'] + (df['std20'] * 2)
-            df['Lower_BB'] = df['SMA20'] - (df['std20'] * 2)
-            
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df['close'],
-                    name='Close Price',
-                    line=dict(color='white', width=1.5)
-                ),
-                row=1, col=1
-            )
-            
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df['SMA20'],
-                    name='SMA 20',
-                    line=dict(color='blue', width=1)
-                ),
-                row=1, col=1
-            )
-            
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df['Upper_BB'],
-                    name='Upper BB',
-                    line=dict(color='gray', width=1, dash='dash'),
-                    showlegend=False
-                ),
-                row=1, col=1
-            )
-            
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df['Lower_BB'],
-                    name='Lower BB',
-                    line=dict(color='gray', width=1, dash='dash'),
-                    fill='tonexty',
-                    fillcolor='rgba(128,128,128,0.2)',
-                    showlegend=False
-                ),
-                row=1, col=1
-            )
+                vertical_spacing=0.05,
+                subplot_titles=[f'{symbol} - Technical Analysis', 'RSI (14)', 'MACD']
+            ))
+            shapes = []
             
             if len(df) > 14:
-                delta = df['close'].diff()
-                gain = delta.mask(delta < 0, 0)
-                loss = -delta.mask(delta > 0, 0)
-                avg_gain = gain.rolling(window=14).mean()
-                avg_loss = loss.rolling(window=14).mean()
-                rs = avg_gain / avg_loss
-                df['RSI'] = 100 - (100 / (1 + rs))
-                
-                fig.add_trace(
-                    go.Scatter(
-                        x=df.index,
-                        y=df['RSI'],
-                        name='RSI',
-                        line=dict(color='purple', width=1.5)
-                    ),
-                    row=2, col=1
-                )
+                data.append({
+                    'type': 'scatter',
+                    'xaxis': 'x2', 'yaxis': 'y2',
+                    'x': x,
+                    'y': indicators['rsi'],
+                    'name': 'RSI',
+                    'line': {'color': 'purple', 'width': 1.5}
+                })
                 
-                fig.add_hline(
-                    y=70, line_dash="dash", line_color="red",
-                    annotation_text="Overbought", row=2, col=1
-                )
-                fig.add_hline(
-                    y=30, line_dash="dash", line_color="green",
-                    annotation_text="Oversold", row=2, col=1
-                )
+                shapes.append(_hline(70, row=2, color="red", dash="dash"))
+                layout['annotations'].append(_hline_label(70, row=2, text="Overbought"))
+                shapes.append(_hline(30, row=2, color="green", dash="dash"))
+                layout['annotations'].append(_hline_label(30, row=2, text="Oversold"))
                 
-                fig.add_hrect(
-                    y0=30, y1=70,
-                    fillcolor="gray", opacity=0.1,
-                    row=2, col=1
-                )
+                shapes.append({
+                    'type': 'rect',
+                    'fillcolor': 'gray', 'opacity': 0.1,
+                    'x0': 0, 'x1': 1, 'xref': 'x2 domain',
+                    'y0': 30, 'y1': 70, 'yref': 'y2'
+                })
             
             if len(df) >= 26:
-                exp1 = df['close'].ewm(span=12, adjust=False).mean()
-                exp2 = df['close'].ewm(span=26, adjust=False).mean()
-                df['MACD'] = exp1 - exp2
-                df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-                df['Histogram'] = df['MACD'] - df['Signal']
+                colors = np.where(indicators['histogram'] >= 0, 'green', 'red').tolist()
                 
-                fig.add_trace(
-                    go.Scatter(
-                        x=df.index,
-                        y=df['MACD'],
-                        name='MACD',
-                        line=dict(color='blue', width=1.5)
-                    ),
-                    row=3, col=1
-                )
+                data.extend([
+                    {
+                        'type': 'scatter',
+                        'xaxis': 'x3', 'yaxis': 'y3',
+                        'x': x,
+                        'y': indicators['macd'],
+                        'name': 'MACD',
+                        'line': {'color': 'blue', 'width': 1.5}
+                    },
+                    {
+                        'type': 'scatter',
+                        'xaxis': 'x3', 'yaxis': 'y3',
+                        'x': x,
+                        'y': indicators['signal'],
+                        'name': 'Signal',
+                        'line': {'color': 'red', 'width': 1.5}
+                    },
+                    {
+                        'type': 'bar',
+                        'xaxis': 'x3', 'yaxis': 'y3',
+                        'x': x,
+                        'y': indicators['histogram'],
+                        'name': 'Histogram',
+                        'marker': {'color': colors},
+                        'opacity': 0.3
+                    }
+                ])
                 
-                fig.add_trace(
-                    go.Scatter(
-                        x=df.index,
-                        y=df['Signal'],
-                        name='Signal',
-                        line=dict(color='red', width=1.5)
-                    ),
-                    row=3, col=1
-                )
-                
-                colors = ['green' if val >= 0 else 'red' for val in df['Histogram']]
-                
-                fig.add_trace(
-                    go.Bar(
-                        x=df.index,
-                        y=df['Histogram'],
-                        name='Histogram',
-                        marker_color=colors,
-                        opacity=0.3
-                    ),
-                    row=3, col=1
-                )
-                
-                fig.add_hline(y=0, line_color="white", line_width=0.5, row=3, col=1)
-            
-            fig.update_layout(
-                template='plotly_dark',
-                paper_bgcolor='#1e1e1e',
-                plot_bgcolor='#1e1e1e',
-                font=dict(color='#e0e0e0', size=12),
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                ),
-                height=800,
-                margin=dict(l=50, r=50, t=80, b=50)
-            )
+                shapes.append(_hline(0, row=3, color="white", width=0.5))
             
-            fig.update_xaxes(gridcolor='#3e3e3e', showgrid=True)
-            fig.update_yaxes(gridcolor='#3e3e3e', showgrid=True)
+            layout['shapes'] = shapes
             
-            fig.update_yaxes(title_text="Price", row=1, col=1)
-            fig.update_yaxes(title_text="RSI", range=[0, 100], row=2, col=1)
-            fig.update_yaxes(title_text="MACD", row=3, col=1)
+            for axis in ('xaxis', 'xaxis2', 'xaxis3', 'yaxis', 'yaxis2', 'yaxis3'):
+                layout[axis].update(_GRID_AXIS)
             
-            return fig.to_json()
+            layout['yaxis']['title'] = {'text': "Price"}
+            layout['yaxis2'].update(title={'text': "RSI"}, range=[0, 100])
+            layout['yaxis3']['title'] = {'text': "MACD"}
+            
+            return _fig_to_json({'data': data, 'layout': layout})
             
         except Exception as e:
             logger.error(f"Error creating technical analysis chart: {e}")
@@ -324,14 +614,27 @@ class StockVisualizer:
             colors = ['#00d9ff', '#ff6b6b', '#4ecdc4', '#ffe66d', '#a8dadc']
             
             for idx, (symbol, df) in enumerate(stock_data_dict.items()):
-                if not isinstance(df.index, pd.DatetimeIndex):
-                    df.index = pd.to_datetime(df.index)
+                _ensure_datetime_index(df)
+                
+                # Plain ndarrays - no intermediate Series per symbol
+                close = df['close'].to_numpy(dtype='float64')
+                normalized = (close / close[0] - 1.0) * 100.0
+                volume = df['volume'].to_numpy(dtype='float64')
+                x = df.index
                 
-                normalized = (df['close'] / df['close'].iloc[0] - 1) * 100
+                if len(df) > _MAX_LINE_POINTS:
+                    keep = _lttb_indices(normalized, _MAX_LINE_POINTS)
+                    x = x[keep]
+                    normalized = normalized[keep]
+                    volume = volume[keep]
+                
+                x = _x_values(x)
+                normalized = _f32(normalized)
+                volume = _volume_array(volume)
                 
                 fig.add_trace(
                     go.Scatter(
-                        x=df.index,
+                        x=x,
                         y=normalized,
                         name=symbol,
                         line=dict(color=colors[idx % len(colors)], width=2)
@@ -341,8 +644,8 @@ class StockVisualizer:
                 
                 fig.add_trace(
                     go.Bar(
-                        x=df.index,
-                        y=df['volume'],
+                        x=x,
+                        y=volume,
                         name=f'{symbol} Vol',
                         marker_color=colors[idx % len(colors)],
                         opacity=0.6
@@ -352,31 +655,16 @@ class StockVisualizer:
             
             fig.add_hline(y=0, line_color="white", line_width=0.5, row=1, col=1)
             
-            fig.update_layout(
-                template='plotly_dark',
-                paper_bgcolor='#1e1e1e',
-                plot_bgcolor='#1e1e1e',
-                font=dict(color='#e0e0e0', size=12),
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                ),
+            fig.update_layout(_chart_layout(
                 height=700,
-                margin=dict(l=50, r=50, t=80, b=50),
-                hovermode='x unified'
-            )
+                hovermode='x unified',
+                xaxis=_GRID_AXIS,
+                xaxis2=_GRID_AXIS,
+                yaxis={**_GRID_AXIS, 'title': {'text': "% Change"}},
+                yaxis2={**_GRID_AXIS, 'title': {'text': "Volume"}}
+            ))
             
-            fig.update_xaxes(gridcolor='#3e3e3e', showgrid=True)
-            fig.update_yaxes(gridcolor='#3e3e3e', showgrid=True)
-            
-            fig.update_yaxes(title_text="% Change", row=1, col=1)
-            fig.update_yaxes(title_text="Volume", row=2, col=1)
-            
-            return fig.to_json()
+            return _fig_to_json(fig)
             
         except Exception as e:
             logger.error(f"Error creating comparison chart: {e}")
@@ -388,14 +676,19 @@ class GoldVisualizer:
     def create_gold_price_chart(df: pd.DataFrame, title: str = "Gold Price") -> str:
         """Create interactive gold price trend chart"""
         try:
-            if not isinstance(df.index, pd.DatetimeIndex):
-                df.index = pd.to_datetime(df.index)
+            _ensure_datetime_index(df)
+            x = _x_values(df.index)
             
-            fig = go.Figure()
+            fig = go.Figure(layout=_chart_layout(
+                height=500,
+                title=title,
+                xaxis=_GRID_AXIS,
+                yaxis={**_GRID_AXIS, 'title': 'Price (USD/oz)'}
+            ))
             
             fig.add_trace(
                 go.Scatter(
-                    x=df.index,
+                    x=x,
                     y=df['price'],
                     name='Gold Price',
                     line=dict(color='gold', width=2),
@@ -405,41 +698,16 @@ class GoldVisualizer:
             )
             
             if len(df) >= 7:
-                df['MA7'] = df['price'].rolling(window=7).mean()
                 fig.add_trace(
                     go.Scatter(
-                        x=df.index,
-                        y=df['MA7'],
+                        x=x,
+                        y=_rolling_mean(df['price'].to_numpy(dtype='float64'), 7),
                         name='7-day MA',
                         line=dict(color='orange', width=1.5, dash='dash')
                     )
                 )
             
-            fig.update_layout(
-                title=title,
-                template='plotly_dark',
-                paper_bgcolor='#1e1e1e',
-                plot_bgcolor='#1e1e1e',
-                font=dict(color='#e0e0e0', size=12),
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                ),
-                height=500,
-                margin=dict(l=50, r=50, t=80, b=50),
-                xaxis=dict(gridcolor='#3e3e3e', showgrid=True),
-                yaxis=dict(
-                    title='Price (USD/oz)',
-                    gridcolor='#3e3e3e',
-                    showgrid=True
-                )
-            )
-            
-            return fig.to_json()
+            return _fig_to_json(fig)
             
         except Exception as e:
             logger.error(f"Error creating gold chart: {e}")
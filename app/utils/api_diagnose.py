@@ -3,7 +3,11 @@ API diagnostic utilities to test external API connections
 """
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 from ..config import (
     EODHD_API_KEY, EODHD_BASE_URL,
     APISED_API_KEY, APISED_BASE_URL,
@@ -13,62 +17,111 @@ from ..config import (
     NEWSAPI_KEY
 )
 
+# Imported once here rather than on every Tavily check
+try:
+    from tavily import Client as TavilyClient
+except ImportError:
+    TavilyClient = None
+
 logger = logging.getLogger(__name__)
 
-def run_all_api_tests():
-    """Test all API connections"""
-    results = {
-        "timestamp": datetime.now().isoformat(),
-        "tests": {}
-    }
+def _get_requests_session():
+    session = requests.Session()
+    
+    # Health checks only need the status line - keep retries short
+    retry_strategy = Retry(total=1, backoff_factor=0.2)
+    
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=8,
+        pool_maxsize=8
+    )
     
-    # Test EODHD
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    
+    return session
+
+_http_session = _get_requests_session()
+
+_tavily_client = None
+
+def _get_tavily_client():
+    """Get (lazily create) the Tavily client used by diagnostics"""
+    global _tavily_client
+    if _tavily_client is None:
+        _tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
+    return _tavily_client
+
+def _test_eodhd() -> Tuple[str, Dict]:
+    """Test EODHD"""
     try:
         url = f"{EODHD_BASE_URL}/eod/AAPL.US"
         params = {"api_token": EODHD_API_KEY, "fmt": "json", "limit": 1}
-        response = requests.get(url, params=params, timeout=5)
-        results["tests"]["eodhd"] = {
+        response = _http_session.get(url, params=params, timeout=5)
+        return "eodhd", {
             "status": "ok" if response.status_code == 200 else "error",
             "status_code": response.status_code
         }
     except Exception as e:
-        results["tests"]["eodhd"] = {"status": "error", "error": str(e)}
-    
-    # Test Apised Gold
+        return "eodhd", {"status": "error", "error": str(e)}
+
+def _test_apised() -> Tuple[str, Dict]:
+    """Test Apised Gold"""
     try:
         url = f"{APISED_BASE_URL}/latest"
         headers = {"x-api-key": APISED_API_KEY}
         params = {"metals": "XAU", "base_currency": "VND", "currencies": "VND"}
-        response = requests.get(url, headers=headers, params=params, timeout=5)
-        results["tests"]["apised_gold"] = {
+        response = _http_session.get(url, headers=headers, params=params, timeout=5)
+        return "apised_gold", {
             "status": "ok" if response.status_code == 200 else "error",
             "status_code": response.status_code
         }
     except Exception as e:
-        results["tests"]["apised_gold"] = {"status": "error", "error": str(e)}
+        return "apised_gold", {"status": "error", "error": str(e)}
+
+def _test_tavily() -> Tuple[str, Dict]:
+    """Test Tavily (skipped if the SDK isn't installed)"""
+    if TavilyClient is None:
+        return "tavily", {"status": "skipped", "error": "tavily package not installed"}
     
-    # Test Tavily
     try:
-        from tavily import Client
-        client = Client(api_key=TAVILY_API_KEY)
-        response = client.search("test", max_results=1)
-        results["tests"]["tavily"] = {
+        response = _get_tavily_client().search("test", max_results=1)
+        return "tavily", {
             "status": "ok" if response else "error"
         }
     except Exception as e:
-        results["tests"]["tavily"] = {"status": "error", "error": str(e)}
+        return "tavily", {"status": "error", "error": str(e)}
+
+def _test_newsdata() -> Optional[Tuple[str, Dict]]:
+    """Test NewsData.io (skipped if not configured)"""
+    if not NEWSDATA_API_KEY:
+        return None
+    
+    try:
+        url = f"https://newsdata.io/api/1/archive"
+        params = {"apikey": NEWSDATA_API_KEY, "q": "test", "language": "en"}
+        response = _http_session.get(url, params=params, timeout=5)
+        return "newsdata", {
+            "status": "ok" if response.status_code == 200 else "error",
+            "status_code": response.status_code
+        }
+    except Exception as e:
+        return "newsdata", {"status": "error", "error": str(e)}
+
+_API_TESTS = (_test_eodhd, _test_apised, _test_tavily, _test_newsdata)
+
+def run_all_api_tests():
+    """Test all API connections (concurrently - they are independent)"""
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "tests": {}
+    }
     
-    # Test NewsData.io
-    if NEWSDATA_API_KEY:
-        try:
-            url = f"https://newsdata.io/api/1/archive"
-            params = {"apikey": NEWSDATA_API_KEY, "q": "test", "language": "en"}
-            response = requests.get(url, params=params, timeout=5)
-            results["tests"]["newsdata"] = {
-                "status": "ok" if response.status_code == 200 else "error",
-                "status_code": response.status_code
-            }
-        except Exception as e:
-            results["tests"]["newsdata"] = {"status": "error", "error": str(e)}
+    with ThreadPoolExecutor(max_workers=len(_API_TESTS)) as executor:
+        for outcome in executor.map(lambda test: test(), _API_TESTS):
+            if outcome:
+                name, result = outcome
+                results["tests"][name] = result
     
     return results
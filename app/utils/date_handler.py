@@ -5,6 +5,47 @@ import calendar
 
 logger = logging.getLogger(__name__)
 
+# Vietnamese month / weekday names, indexed by month-1 and datetime.weekday()
+_VN_MONTHS = ("tháng 1", "tháng 2", "tháng 3", "tháng 4", "tháng 5", "tháng 6",
+              "tháng 7", "tháng 8", "tháng 9", "tháng 10", "tháng 11", "tháng 12")
+_VN_WEEKDAYS = ("Thứ hai", "Thứ ba", "Thứ tư", "Thứ năm", "Thứ sáu", "Thứ bảy", "Chủ nhật")
+
+# Phrases asking for the current date (English + Vietnamese)
+_DATE_QUERY_PATTERNS = (
+    "what day is today",
+    "what is today's date",
+    "what date is today",
+    "what is the date today",
+    "today's date",
+    "current date",
+    "what is the current date",
+    "what day is it",
+    "what date is it",
+    "hôm nay là ngày mấy",
+    "hôm nay là ngày bao nhiêu",
+    "ngày hôm nay",
+    "ngày bao nhiêu",
+    "ngày mấy",
+    "hôm nay ngày mấy",
+    "bây giờ là ngày mấy"
+)
+_DATE_QUERY_RE = re.compile("|".join(map(re.escape, _DATE_QUERY_PATTERNS)))
+
+# Relative time references, one named group per reference kind
+_DATE_REFERENCE_RE = re.compile(
+    r"(?P<today>today|hôm nay)"
+    r"|(?P<yesterday>yesterday|hôm qua)"
+    r"|(?P<tomorrow>tomorrow|ngày mai)"
+    r"|(?P<week>this week|tuần này)"
+    r"|(?P<month>this month|tháng này)"
+    r"|(?P<year>this year|năm nay)"
+)
+
+# Last built results - formats change every second, the prompt block is
+# refreshed once per minute
+_formats_cache = {"key": None, "val": None}
+_context_block_cache = {"key": None, "val": None}
+
 class DateContext:
     """Class to provide date context and temporal awareness functions"""
     
@@ -15,48 +56,44 @@ class DateContext:
     
     @staticmethod
     def get_all_formats():
-        """Get current date in all useful formats - ALWAYS fresh"""
-        # Always get a fresh datetime.now()
+        """Get current date in all useful formats - fresh to the second"""
         now = datetime.now()
-        current_year = now.year
+        key = now.replace(microsecond=0)
+        if _formats_cache["key"] == key:
+            return dict(_formats_cache["val"])
         
-        # Get month names in Vietnamese
-        vn_months = ["tháng 1", "tháng 2", "tháng 3", "tháng 4", "tháng 5", "tháng 6", 
-                     "tháng 7", "tháng 8", "tháng 9", "tháng 10", "tháng 11", "tháng 12"]
+        current_year = now.year
+        weekday_vn = _VN_WEEKDAYS[now.weekday()]
+        month_vn = _VN_MONTHS[now.month - 1]
         
-        return {
+        formats = {
             "iso": now.strftime('%Y-%m-%d'),
             "dmy": now.strftime('%d/%m/%Y'),
             "mdy": now.strftime('%m/%d/%Y'),
             "full_en": now.strftime('%A, %B %d, %Y'),
-            "full_vn": f"{DateContext.get_vietnamese_weekday(now.weekday())}, ngày {now.day} {vn_months[now.month-1]} năm {now.year}",
+            "full_vn": f"{weekday_vn}, ngày {now.day} {month_vn} năm {now.year}",
             "time": now.strftime('%H:%M:%S'),
             "datetime": now.strftime('%Y-%m-%d %H:%M:%S'),
             "day": now.day,
             "month": now.month,
             "year": current_year,  # Explicitly include current year
             "weekday_en": now.strftime('%A'),
-            "weekday_vn": DateContext.get_vietnamese_weekday(now.weekday()),
+            "weekday_vn": weekday_vn,
             "month_name_en": now.strftime('%B'),
-            "month_name_vn": vn_months[now.month-1],
+            "month_name_vn": month_vn,
             "timestamp": int(now.timestamp()),
             "current_year": current_year,  # Add explicit current year
             "current_year_str": str(current_year)  # Add string version
         }
+        
+        _formats_cache["val"] = formats
+        _formats_cache["key"] = key
+        return dict(formats)
     
     @staticmethod
     def get_vietnamese_weekday(weekday_num):
         """Get Vietnamese weekday name"""
-        weekday_names = {
-            0: "Thứ hai",
-            1: "Thứ ba",
-            2: "Thứ tư",
-            3: "Thứ năm",
-            4: "Thứ sáu",
-            5: "Thứ bảy",
-            6: "Chủ nhật"
-        }
-        return weekday_names.get(weekday_num, "")
+        return _VN_WEEKDAYS[weekday_num] if 0 <= weekday_num < 7 else ""
     
     @staticmethod
     def is_date_query(text):
@@ -64,38 +101,7 @@ class DateContext:
         if not text:
             return False
             
-        text = text.lower()
-        
-        # English date patterns
-        english_patterns = [
-            "what day is today",
-            "what is today's date",
-            "what date is today",
-            "what is the date today",
-            "today's date",
-            "current date",
-            "what is the current date",
-            "what day is it",
-            "what date is it"
-        ]
-        
-        # Vietnamese date patterns
-        vietnamese_patterns = [
-            "hôm nay là ngày mấy",
-            "hôm nay là ngày bao nhiêu",
-            "ngày hôm nay",
-            "ngày bao nhiêu",
-            "ngày mấy",
-            "hôm nay ngày mấy",
-            "bây giờ là ngày mấy"
-        ]
-        
-        # Check for pattern matches
-        for pattern in english_patterns + vietnamese_patterns:
-            if pattern in text:
-                return True
-        
-        return False
+        return _DATE_QUERY_RE.search(text.lower()) is not None
     
     @staticmethod
     def format_date_response(query):
@@ -122,9 +128,14 @@ class DateContext:
     @staticmethod
     def get_temporal_context_block():
         """Get a standardized temporal context block for LLM prompts"""
+        now = datetime.now()
+        key = (now.year, now.month, now.day, now.hour, now.minute)
+        if _context_block_cache["key"] == key:
+            return _context_block_cache["val"]
+        
         formats = DateContext.get_all_formats()
         
-        return f"""
+        block = f"""
         [CRITICAL TEMPORAL CONTEXT - ABSOLUTE GROUND TRUTH]
         Today's date: {formats['dmy']} ({formats['iso']})
         Current day: {formats['full_en']}
@@ -135,6 +146,10 @@ class DateContext:
         You MUST NEVER refer to {formats['current_year']} as a future year - it is the PRESENT year.
         You MUST NEVER claim to lack data after December 2024 or any past date - always provide analysis based on data available as of today.
         """
+        
+        _context_block_cache["val"] = block
+        _context_block_cache["key"] = key
+        return block
     
     @staticmethod
     def extract_date_references(text):
@@ -143,32 +158,34 @@ class DateContext:
         now = datetime.now()
         references = {}
         
-        # Match common time references
-        if "today" in text or "hôm nay" in text:
+        # Single pass over the text, then resolve each kind found
+        found = {m.lastgroup for m in _DATE_REFERENCE_RE.finditer(text)}
+        
+        if "today" in found:
             references["today"] = now.strftime("%Y-%m-%d")
             
-        if "yesterday" in text or "hôm qua" in text:
+        if "yesterday" in found:
             yesterday = now - timedelta(days=1)
             references["yesterday"] = yesterday.strftime("%Y-%m-%d")
             
-        if "tomorrow" in text or "ngày mai" in text:
+        if "tomorrow" in found:
             tomorrow = now + timedelta(days=1)
             references["tomorrow"] = tomorrow.strftime("%Y-%m-%d")
             
-        if "this week" in text or "tuần này" in text:
+        if "week" in found:
             start_of_week = now - timedelta(days=now.weekday())
             end_of_week = start_of_week + timedelta(days=6)
             references["week_start"] = start_of_week.strftime("%Y-%m-%d")
             references["week_end"] = end_of_week.strftime("%Y-%m-%d")
             
-        if "this month" in text or "tháng này" in text:
+        if "month" in found:
             last_day = calendar.monthrange(now.year, now.month)[1]
             start_of_month = date(now.year, now.month, 1)
             end_of_month = date(now.year, now.month, last_day)
             references["month_start"] = start_of_month.strftime("%Y-%m-%d")
             references["month_end"] = end_of_month.strftime("%Y-%m-%d")
             
-        if "this year" in text or "năm nay" in text:
+        if "year" in found:
             references["year"] = str(now.year)
         
         return references
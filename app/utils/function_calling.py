@@ -3,12 +3,57 @@ import json
 from datetime import datetime, timedelta
 import traceback
 import re
+import asyncio
+from collections import defaultdict
+from cachetools import TTLCache
 
 from ..services.tavily_service import TavilySearch
-from ..services.stock_service import get_latest_stock_price, calculate_vn_stock_technical_indicators
+from ..services.stock_service import get_latest_stock_price, calculate_vn_stock_technical_indicators, fetch_vn_stock_data
+from ..database.connection import session_scope
 
 logger = logging.getLogger(__name__)
 
+# Cap on per-symbol lookups in flight at once (upstream providers rate-limit)
+MAX_CONCURRENT_SYMBOL_FETCHES = 8
+
+# Short-lived tool results: the LLM often repeats the same call within a
+# conversation. Keyed on hashable args only (never the DB session)
+_market_data_cache = TTLCache(maxsize=512, ttl=60)    # (symbol, include_technical) -> data
+_ytd_cache = TTLCache(maxsize=512, ttl=300)           # (symbol, start, end) -> sorted records
+_search_cache = TTLCache(maxsize=256, ttl=120)        # normalized query -> Tavily response
+
+# Tavily searches in flight, so identical concurrent queries share one request
+_search_inflight = {}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def clear_function_cache():
+    """Drop cached market data / YTD / search tool results"""
+    _market_data_cache.clear()
+    _ytd_cache.clear()
+    _search_cache.clear()
+
+async def _search_news_cached(query: str):
+    """Tavily search with a short TTL cache and single-flight for identical queries"""
+    key = _WHITESPACE_RE.sub(' ', query.strip().lower())
+    
+    cached = _search_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    task = _search_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(TavilySearch.search_financial_news(query, category="finance"))
+        _search_inflight[key] = task
+        task.add_done_callback(lambda _: _search_inflight.pop(key, None))
+    
+    # shield: one caller being cancelled must not cancel the shared search
+    search_results = await asyncio.shield(task)
+    
+    if search_results and search_results.get("results") and not search_results.get("error"):
+        _search_cache[key] = search_results
+    return search_results
+
 # Function definitions that will be provided to the LLM
 FUNCTION_DEFINITIONS = [
     {
@@ -69,6 +114,23 @@ FUNCTION_DEFINITIONS = [
     }
 ]
 
+# Vietnamese market overview questions get a canned analysis instead of a search
+_VN_ANALYSIS_RE = re.compile(r'vn[- ]?index|chỉ số vn|(?:thị trường|chứng khoán) việt nam|vietnam stock market')
+_VN_ANALYSIS_TEMPLATE = """
+                    Thị trường chứng khoán Việt Nam trong năm {current_year} đã chứng kiến nhiều biến động.
+                    
+                    VN-Index, chỉ số chính của thị trường Việt Nam, đã có sự tăng trưởng đáng kể kể từ đầu năm với thanh khoản được cải thiện so với năm trước. Các nhóm ngành ngân hàng, bán lẻ và công nghệ thông tin là những động lực chính cho sự phục hồi của thị trường.
+                    
+                    Đặc biệt, dòng vốn ngoại đã quay trở lại thị trường Việt Nam khi các chỉ số kinh tế vĩ mô tiếp tục cho thấy sự ổn định và tăng trưởng. Các yếu tố đáng chú ý nhất từ đầu năm đến nay bao gồm:
+                    
+                    1. Thanh khoản thị trường tăng mạnh, với giá trị giao dịch bình quân đạt trên 15.000 tỷ đồng/phiên.
+                    2. Nhóm cổ phiếu vốn hóa lớn như ngân hàng và bất động sản dẫn dắt thị trường.
+                    3. Khối ngoại đã có xu hướng mua ròng trở lại sau giai đoạn bán ròng trước đó.
+                    4. Tỷ lệ P/E trung bình của thị trường đã điều chỉnh về mức hợp lý hơn.
+                    
+                    Với các chính sách hỗ trợ từ chính phủ và triển vọng kinh tế tích cực, nhiều chuyên gia dự báo VN-Index có thể tiếp tục xu hướng tăng trong các tháng còn lại của năm {current_year}.
+                    """
+
 async def search_financial_data(params, session=None):
     """
     Search for up-to-date financial information using Tavily
@@ -78,37 +140,21 @@ async def search_financial_data(params, session=None):
         time_range = params.get("time_range", "")
         
         now = datetime.now()
+        timestamp = now.isoformat()
         current_year = now.year
         today_date = now.strftime('%Y-%m-%d')
         
-        vn_market_terms = [
-            "vnindex", "vn-index", "vn index", "chỉ số vn", 
-            "thị trường chứng khoán việt nam", "chứng khoán việt nam", 
-            "thị trường việt nam", "vietnam stock market"
-        ]
+        query_lower = query.lower()
         
-        if any(term in query.lower() for term in vn_market_terms) and "phân tích" in query.lower():
+        if "phân tích" in query_lower and _VN_ANALYSIS_RE.search(query_lower):
             return {
                 "status": "success",
                 "query": query,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "search_date": today_date,
                 "results": [{
                     "title": f"Phân tích thị trường chứng khoán Việt Nam - Cập nhật ngày {today_date}",
-                    "content": f"""
-                    Thị trường chứng khoán Việt Nam trong năm {current_year} đã chứng kiến nhiều biến động.
-                    
-                    VN-Index, chỉ số chính của thị trường Việt Nam, đã có sự tăng trưởng đáng kể kể từ đầu năm với thanh khoản được cải thiện so với năm trước. Các nhóm ngành ngân hàng, bán lẻ và công nghệ thông tin là những động lực chính cho sự phục hồi của thị trường.
-                    
-                    Đặc biệt, dòng vốn ngoại đã quay trở lại thị trường Việt Nam khi các chỉ số kinh tế vĩ mô tiếp tục cho thấy sự ổn định và tăng trưởng. Các yếu tố đáng chú ý nhất từ đầu năm đến nay bao gồm:
-                    
-                    1. Thanh khoản thị trường tăng mạnh, với giá trị giao dịch bình quân đạt trên 15.000 tỷ đồng/phiên.
-                    2. Nhóm cổ phiếu vốn hóa lớn như ngân hàng và bất động sản dẫn dắt thị trường.
-                    3. Khối ngoại đã có xu hướng mua ròng trở lại sau giai đoạn bán ròng trước đó.
-                    4. Tỷ lệ P/E trung bình của thị trường đã điều chỉnh về mức hợp lý hơn.
-                    
-                    Với các chính sách hỗ trợ từ chính phủ và triển vọng kinh tế tích cực, nhiều chuyên gia dự báo VN-Index có thể tiếp tục xu hướng tăng trong các tháng còn lại của năm {current_year}.
-                    """,
+                    "content": _VN_ANALYSIS_TEMPLATE.format(current_year=current_year),
                     "url": "https://finance.vietstock.vn/",
                     "source": "Dữ liệu tổng hợp từ nhiều nguồn",
                     "published_date": today_date
@@ -117,29 +163,26 @@ async def search_financial_data(params, session=None):
         
         if time_range:
             time_aware_query = f"{query} {time_range}"
-        elif any(term in query.lower() for term in ["today", "current", "latest", "hôm nay", "hiện tại"]):
+        elif any(term in query_lower for term in ["today", "current", "latest", "hôm nay", "hiện tại"]):
             time_aware_query = f"{query} as of {today_date}"
         elif str(current_year) not in query:
             time_aware_query = f"{query} {current_year} current data"
         else:
             time_aware_query = query
             
-        search_results = await TavilySearch.search_financial_news(
-            time_aware_query, 
-            category="finance"
-        )
+        search_results = await _search_news_cached(time_aware_query)
         
         if not search_results or not search_results.get("results"):
             return {
                 "status": "no_results",
                 "query": time_aware_query,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
             
         processed_results = {
             "status": "success",
             "query": time_aware_query,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "search_date": today_date,
             "results": []
         }
@@ -184,25 +227,49 @@ async def get_current_market_data(params, session=None):
             "data": {}
         }
         
-        for symbol in symbols:
-            vn_data = await get_latest_stock_price(session, symbol, is_vn_stock=True)
-            if vn_data:
-                results["data"][symbol] = vn_data
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SYMBOL_FETCHES)
+        
+        async def fetch_one(symbol):
+            cache_key = (symbol.upper(), bool(include_technical))
+            cached = _market_data_cache.get(cache_key)
+            if cached is not None:
+                return symbol, cached
+            
+            async with semaphore:
+                # Own session per symbol - lookups run concurrently and each
+                # commits/rolls back its own unit of work
+                with session_scope() as symbol_session:
+                    data = await get_latest_stock_price(symbol_session, symbol, is_vn_stock=True)
+                if not data:
+                    data = await get_latest_stock_price(None, symbol, is_vn_stock=False)
+                    if data:
+                        _market_data_cache[cache_key] = data
+                    return symbol, data
                 
+                # Copy - the quote dict is shared with the quote cache
+                data = dict(data)
                 if include_technical:
                     tech_indicators = await calculate_vn_stock_technical_indicators(symbol)
                     if tech_indicators and "error" not in tech_indicators:
-                        results["data"][symbol]["technical"] = {
+                        data["technical"] = {
                             "sma20": tech_indicators.get("SMA20"),
                             "sma50": tech_indicators.get("SMA50"),
                             "rsi": tech_indicators.get("RSI"),
                             "trend": tech_indicators.get("trend")
                         }
-            else:
-                from ..services.us_stock_service import get_latest_us_stock_price
-                us_data = await get_latest_us_stock_price(session, symbol)
-                if us_data:
-                    results["data"][symbol] = us_data
+                _market_data_cache[cache_key] = data
+                return symbol, data
+        
+        # Symbols are independent - fetch them concurrently
+        fetched = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols), return_exceptions=True)
+        
+        for outcome in fetched:
+            if isinstance(outcome, Exception):
+                logger.error(f"Error fetching market data: {outcome}")
+                continue
+            symbol, data = outcome
+            if data:
+                results["data"][symbol] = data
         
         if not results["data"]:
             return {
@@ -245,14 +312,53 @@ async def get_year_to_date_performance(params, session=None):
             "performance": {}
         }
         
-        from ..services.stock_service import fetch_vn_stock_data
+        grouped = {}
+        missing = []
         for symbol in symbols:
+            cached = _ytd_cache.get((symbol.upper(), start_date, end_date))
+            if cached is not None:
+                grouped[symbol.upper()] = cached
+            else:
+                missing.append(symbol)
+        
+        # One batched fetch for the uncached symbols, split per symbol afterwards
+        if missing:
+            fetched = defaultdict(list)
             try:
-                stock_data = await fetch_vn_stock_data([symbol], start_date=start_date, end_date=end_date)
+                all_data = await fetch_vn_stock_data(missing, start_date=start_date, end_date=end_date)
+                for item in all_data:
+                    fetched[item["symbol"]].append(item)
+            except Exception as batch_error:
+                logger.warning(f"Batch YTD fetch failed, falling back to per-symbol: {str(batch_error)}")
+                semaphore = asyncio.Semaphore(MAX_CONCURRENT_SYMBOL_FETCHES)
+                
+                async def fetch_one(symbol):
+                    async with semaphore:
+                        try:
+                            return symbol, await fetch_vn_stock_data([symbol], start_date=start_date, end_date=end_date)
+                        except Exception as symbol_error:
+                            return symbol, symbol_error
                 
+                for symbol, stock_data in await asyncio.gather(*(fetch_one(symbol) for symbol in missing)):
+                    fetched[symbol.upper()] = stock_data
+            
+            for symbol, stock_data in fetched.items():
+                if stock_data and not isinstance(stock_data, Exception):
+                    stock_data.sort(key=lambda item: item["timestamp"])
+                    _ytd_cache[(symbol, start_date, end_date)] = stock_data
+                grouped[symbol] = stock_data
+        
+        for symbol in symbols:
+            stock_data = grouped.get(symbol.upper())
+            if isinstance(stock_data, Exception):
+                logger.error(f"Error processing symbol {symbol}: {str(stock_data)}")
+                results["performance"][symbol] = {"status": "error", "message": str(stock_data)}
+                continue
+            
+            try:
                 if stock_data and len(stock_data) >= 2:
-                    start_price = next((item["close_price"] for item in stock_data if item["symbol"] == symbol), None)
-                    end_price = next((item["close_price"] for item in reversed(stock_data) if item["symbol"] == symbol), None)
+                    start_price = stock_data[0]["close_price"]
+                    end_price = stock_data[-1]["close_price"]
                     
                     if start_price and end_price:
                         change_pct = ((end_price - start_price) / start_price) * 100
@@ -301,7 +407,13 @@ async def dispatch_function_call(function_call, session=None):
     """
     try:
         function_name = function_call.get("name")
-        arguments = function_call.get("arguments", {})
+        
+        # Resolve the handler first - unknown names never pay for argument parsing
+        handler_func = FUNCTION_MAP.get(function_name)
+        if handler_func is None:
+            return {"error": f"Unknown function: {function_name}"}
+        
+        arguments = function_call.get("arguments") or {}
         
         if isinstance(arguments, str):
             try:
@@ -310,112 +422,121 @@ async def dispatch_function_call(function_call, session=None):
                 logger.error(f"Failed to parse function arguments: {arguments}")
                 return {"error": "Invalid function arguments format"}
         
-        if function_name not in FUNCTION_MAP:
-            return {"error": f"Unknown function: {function_name}"}
-        
-        handler_func = FUNCTION_MAP[function_name]
-        result = await handler_func(arguments, session)
-        
-        return result
+        return await handler_func(arguments, session)
         
     except Exception as e:
         logger.error(f"Error dispatching function call: {str(e)}")
         logger.debug(traceback.format_exc())
         return {"error": str(e)}
 
-def is_time_sensitive_query(query):
+# Phrases that mark a query as needing current market data
+MARKET_ANALYSIS_TERMS = (
+    "phân tích thị trường", "thị trường chứng khoán", "vnindex", "vn-index", 
+    "vn index", "chỉ số vn", "thị trường việt nam", "cổ phiếu",
+    "diễn biến thị trường", "xu hướng thị trường", "dòng tiền", "thanh khoản",
+    "từ đầu năm", "kể từ đầu năm", "đầu năm đến nay", "nhóm ngành", "bluechip",
+    
+    "market analysis", "stock market", "vietnam market", "vietnam stock", 
+    "vietnamese market", "vietnamese stock", "market performance", 
+    "market trend", "year to date", "ytd", "sector performance",
+    "market sentiment", "market outlook"
+)
+
+# Time markers (year-based markers are covered by the current-year check)
+TIME_MARKERS = (
+    "today", "current", "latest", "now", "this week", "this month", "recently",
+    "this year", "year to date", "ytd", "recent", "up to date", "as of now",
+    "since january", "last month", "past month",
+    "past few weeks", "past quarter", "this quarter", "currently", "at present",
+    
+    "hôm nay", "hiện tại", "hiện nay", "gần đây", "tuần này", "tháng này",
+    "năm nay", "từ đầu năm đến nay", "mới đây", "mới nhất",
+    "kể từ tháng giêng", "quý này", "mấy tuần qua", "tháng vừa qua", 
+    "quý vừa qua", "tới nay", "đến nay", "vừa rồi", "vừa qua"
+)
+
+def _phrase_trie_pattern(phrases) -> str:
     """
-    Check if a query is time-sensitive (requires current data)
+    Regex matching any of `phrases`, factored as a character trie so shared
+    prefixes are tried once per position (a flat a|b|c alternation retries
+    every phrase at every position and is slower than plain 'in' checks)
     """
-    current_year = datetime.now().year
-    year_str = str(current_year)
-    
-    query_lower = query.lower()
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
     
-    market_analysis_terms = [
-        "phân tích thị trường", "thị trường chứng khoán", "vnindex", "vn-index", 
-        "vn index", "chỉ số vn", "thị trường việt nam", "cổ phiếu",
-        "diễn biến thị trường", "xu hướng thị trường", "dòng tiền", "thanh khoản",
-        "từ đầu năm", "kể từ đầu năm", "đầu năm đến nay", "nhóm ngành", "bluechip",
-        
-        "market analysis", "stock market", "vietnam market", "vietnam stock", 
-        "vietnamese market", "vietnamese stock", "market performance", 
-        "market trend", "year to date", "ytd", "sector performance",
-        "market sentiment", "market outlook"
-    ]
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A phrase ends here but longer ones continue - the rest is optional
+        return f'(?:{pattern})?' if '' in node else pattern
     
-    if any(term in query_lower for term in market_analysis_terms):
+    return build(trie)
+
+# Compiled once: one scan of the query for all terms instead of ~70 'in' checks
+_TIME_SENSITIVE_RE = re.compile(_phrase_trie_pattern(MARKET_ANALYSIS_TERMS + TIME_MARKERS))
+_TICKER_LIKE_RE = re.compile(r'\b[A-Z]{3}\b')
+
+def is_time_sensitive_query(query):
+    """
+    Check if a query is time-sensitive (requires current data)
+    """
+    if _TIME_SENSITIVE_RE.search(query.lower()):
         return True
     
-    time_markers = [
-        "today", "current", "latest", "now", "this week", "this month", "recently",
-        "this year", "year to date", "ytd", "recent", "up to date", "as of now",
-        f"in {year_str}", f"{year_str}", "since january", "last month", "past month",
-        "past few weeks", "past quarter", "this quarter", "currently", "at present",
-        
-        "hôm nay", "hiện tại", "hiện nay", "gần đây", "tuần này", "tháng này",
-        "năm nay", "từ đầu năm đến nay", "mới đây", "mới nhất", f"năm {year_str}",
-        "kể từ tháng giêng", "quý này", "mấy tuần qua", "tháng vừa qua", 
-        "quý vừa qua", "tới nay", "đến nay", "vừa rồi", "vừa qua"
-    ]
-    
-    for marker in time_markers:
-        if marker in query_lower:
-            return True
-    
-    if year_str in query:
+    if str(datetime.now().year) in query:
         return True
     
-    stock_pattern = r'\b[A-Z]{3}\b'
-    if re.search(stock_pattern, query.upper()):
+    if _TICKER_LIKE_RE.search(query.upper()):
         return True
         
     return False
 
+# Whitelist of known VN stocks (around 100 most active)
+VN_STOCK_SYMBOLS = [
+    # Banks
+    "VCB", "TCB", "BID", "CTG", "MBB", "VPB", "ACB", "HDB", "TPB", "OCB", "SHB", "LPB", 
+    "STB", "EIB", "MSB", "VIB", "BAB",
+    # Property
+    "VIC", "VHM", "NVL", "PDR", "DXG", "KDH", "DIG", "NLG", "HDG", "VRE", "KBC",
+    # Oil & Gas
+    "GAS", "PLX", "PVD", "PVS", "BSR", "POW",
+    # Tech & Telecom
+    "FPT", "VNG", "CMG", "VGI", "ELC", "SAM",
+    # Retail
+    "MWG", "PNJ", "FRT", "DGW", "VTP", "HAX",
+    # Industry & Manufacturing
+    "HPG", "HSG", "NKG", "VCS", "DPM", "DCM", "BMP", "DRC", "PTB", "EVG", "CSV",
+    # Food & Beverage
+    "MSN", "VNM", "SAB", "BHN", "TRA", "QNS", "SBT", "MCH", "KDC",
+    # Other major stocks
+    "SSI", "VCI", "HCM", "VND", "MBS", "VDS", "EVF", "BVH", "BMI", "ACV"
+]
+
+# Whitelist of common US stocks
+US_STOCK_SYMBOLS = [
+    "AAPL", "MSFT", "AMZN", "GOOGL", "GOOG", "META", "TSLA", "NVDA", "JPM", "V", "WMT", 
+    "UNH", "JNJ", "PG", "MA", "XOM", "HD", "BAC", "INTC", "PFE", "CSCO", "VZ", "NFLX",
+    "ADBE", "CRM", "AVGO", "QCOM", "DIS", "KO", "PEP", "T", "MRK"
+]
+
+# All recognized symbols - REMOVING INDICES
+_ALL_SYMBOLS = frozenset(VN_STOCK_SYMBOLS + US_STOCK_SYMBOLS)
+
+# Whole-word uppercase tokens that could be a ticker (1-5 letters: V, T, GOOGL...)
+_SYMBOL_TOKEN_RE = re.compile(r'\b[A-Z]{1,5}\b')
+
 def extract_stock_symbols(query):
     """Extract potential stock symbols from a query using strict whitelist approach"""
-    
-    # Whitelist of known VN stocks (around 100 most active)
-    vn_stocks = [
-        # Banks
-        "VCB", "TCB", "BID", "CTG", "MBB", "VPB", "ACB", "HDB", "TPB", "OCB", "SHB", "LPB", 
-        "STB", "EIB", "MSB", "VIB", "BAB",
-        # Property
-        "VIC", "VHM", "NVL", "PDR", "DXG", "KDH", "DIG", "NLG", "HDG", "VRE", "KBC",
-        # Oil & Gas
-        "GAS", "PLX", "PVD", "PVS", "BSR", "POW",
-        # Tech & Telecom
-        "FPT", "VNG", "CMG", "VGI", "ELC", "SAM",
-        # Retail
-        "MWG", "PNJ", "FRT", "DGW", "VTP", "HAX",
-        # Industry & Manufacturing
-        "HPG", "HSG", "NKG", "VCS", "DPM", "DCM", "BMP", "DRC", "PTB", "EVG", "CSV",
-        # Food & Beverage
-        "MSN", "VNM", "SAB", "BHN", "TRA", "QNS", "SBT", "MCH", "KDC",
-        # Other major stocks
-        "SSI", "VCI", "HCM", "VND", "MBS", "VDS", "EVF", "BVH", "BMI", "ACV"
-    ]
-    
-    # Whitelist of common US stocks
-    us_stocks = [
-        "AAPL", "MSFT", "AMZN", "GOOGL", "GOOG", "META", "TSLA", "NVDA", "JPM", "V", "WMT", 
-        "UNH", "JNJ", "PG", "MA", "XOM", "HD", "BAC", "INTC", "PFE", "CSCO", "VZ", "NFLX",
-        "ADBE", "CRM", "AVGO", "QCOM", "DIS", "KO", "PEP", "T", "MRK"
-    ]
-    
-    # All recognized symbols - REMOVING INDICES
-    all_symbols = set(vn_stocks + us_stocks)
-    
-    # Process the query
-    results = []
-    
-    # Look for exact matches of known symbols in the query (case-insensitive)
-    query_upper = query.upper()
-    for symbol in all_symbols:
-        # Check if symbol exists as whole word with word boundaries
-        pattern = r'\b' + re.escape(symbol) + r'\b'
-        if re.search(pattern, query_upper, re.IGNORECASE):
-            results.append(symbol)
+    # Tokenize once and look each token up in the whitelist set, keeping
+    # first-seen order
+    tokens = _SYMBOL_TOKEN_RE.findall(query.upper())
+    results = list(dict.fromkeys(token for token in tokens if token in _ALL_SYMBOLS))
     
     # No more logic for indices as we don't support them
     
@@ -3,16 +3,21 @@
 Simple healthcheck script for supervisor to use.
 """
 import requests
+from requests.adapters import HTTPAdapter
 import sys
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keep-alive connection to the local API, reused across checks in one process
+_http_session = requests.Session()
+_http_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
 def check_api_health():
     """Check if the API is healthy by calling the health endpoint"""
     try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        response = _http_session.get("http://localhost:8000/health", timeout=5)
         if response.status_code == 200:
             logger.info("API health check passed")
             return True
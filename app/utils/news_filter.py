@@ -1,4 +1,6 @@
 import logging
+from functools import lru_cache
+from typing import Tuple
 from urllib.parse import urlparse, urlunparse
 import re
 import hashlib
@@ -13,18 +15,70 @@ HOMEPAGE_PATTERNS = [
     r'^https?://[^/]+/(category|tag|archive|section)/?$',
 ]
 
-HOMEPAGE_DOMAINS = [
-    'vnexpress.net/',
-    'cafef.vn/',
-    'vietstock.vn/',
-    'investing.com/',
-    'reuters.com/',
-    'bloomberg.com/',
+# Hosts whose short paths are section pages, matched on the netloc
+HOMEPAGE_DOMAINS = frozenset({
+    'vnexpress.net',
+    'cafef.vn',
+    'vietstock.vn',
+    'investing.com',
+    'reuters.com',
+    'bloomberg.com',
+})
+
+# URL substrings/regexes that mark a real article page
+ARTICLE_INDICATORS = [
+    '.html',
+    '-post-',
+    '/news/',
+    '/article/',
+    '/story/',
+    '/bai-viet/',
+    '/tin-tuc/',
+    r'/\d{4}/\d{2}/\d{2}/',
+    r'/\d{8}/',
 ]
 
+# File extensions of assets (images, media, documents) that are never articles
+NON_ARTICLE_EXTENSIONS = frozenset({
+    'jpg', 'jpeg', 'png', 'gif', 'svg', 'webp', 'pdf', 'mp4', 'mp3', 'zip',
+})
+
+# Category -> keywords found in the URL or title
+CATEGORY_KEYWORDS = {
+    'stock': ['stock', 'chứng khoán', 'cổ phiếu', 'thị trường', 'vnindex'],
+    'gold': ['gold', 'vàng', 'kim loại'],
+    'crypto': ['crypto', 'bitcoin', 'ethereum', 'blockchain'],
+    'forex': ['forex', 'ngoại hối', 'currency'],
+    'economy': ['economy', 'kinh tế', 'gdp', 'inflation'],
+    'banking': ['bank', 'ngân hàng', 'credit', 'loan']
+}
+
+# Compiled once at import. Each pattern/list is fused into one alternation so
+# a URL is checked with a single scan per rule instead of one per entry
+_HOMEPAGE_RE = re.compile('|'.join(f'(?:{p})' for p in HOMEPAGE_PATTERNS))
+_ARTICLE_INDICATOR_RE = re.compile('|'.join(ARTICLE_INDICATORS))
+_URL_PREFIX_RE = re.compile(r'^(m\.|mobile\.|www\.)')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+# Keyword -> rank of its category (dict order is the match priority)
+CATEGORY_ORDER = tuple(CATEGORY_KEYWORDS)
+_KEYWORD_TO_CATEGORY = {
+    kw: rank for rank, kws in enumerate(CATEGORY_KEYWORDS.values()) for kw in kws
+}
+_CATEGORY_RE = re.compile('(?=(' + '|'.join(
+    sorted(map(re.escape, _KEYWORD_TO_CATEGORY), key=len, reverse=True)
+) + '))')
+
+# Same characters _NON_WORD_RE removes, restricted to ASCII, for str.translate
+_ASCII_NON_WORD_TABLE = str.maketrans('', '', ''.join(
+    c for c in map(chr, range(128)) if not (c.isalnum() or c == '_' or c.isspace())
+))
+
+@lru_cache(maxsize=8192)
 def canonical_url(url: str) -> str:
     """
-    Canonicalize URL to avoid duplicates
+    Canonicalize URL to avoid duplicates (cached - retries and duplicated
+    search results hit the same URLs)
     - Remove mobile prefixes (m., mobile.)
     - Remove query params
     - Remove trailing slashes
@@ -34,7 +88,7 @@ def canonical_url(url: str) -> str:
         parsed = urlparse(url)
         
         netloc = parsed.netloc.lower()
-        netloc = re.sub(r'^(m\.|mobile\.|www\.)', '', netloc)
+        netloc = _URL_PREFIX_RE.sub('', netloc)
         
         path = parsed.path.rstrip('/')
         
@@ -51,99 +105,138 @@ def hash_title(title: str) -> str:
     """
     Generate hash from normalized title for deduplication
     """
-    normalized = title.lower().strip()
-    normalized = re.sub(r'[^\w\s]', '', normalized)
-    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = title.lower()
+    if normalized.isascii():
+        # Single C-level pass for the common English-title case
+        normalized = normalized.translate(_ASCII_NON_WORD_TABLE)
+    else:
+        normalized = _NON_WORD_RE.sub('', normalized)
+    normalized = ' '.join(normalized.split())
     
-    return hashlib.md5(normalized.encode()).hexdigest()
+    # Non-cryptographic use: BLAKE2b is faster than MD5 here; 16-byte digest
+    # keeps the same 32-char hex length as before
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
 
-def is_homepage_link(url: str) -> bool:
-    """Check if URL is likely a homepage/category page"""
+class SeenSet:
+    """
+    Set of already-seen dedup keys (canonical URLs, title hashes) that stores
+    64-bit BLAKE2b fingerprints instead of the strings themselves
+    """
+    __slots__ = ('_fingerprints',)
+    
+    def __init__(self):
+        self._fingerprints = set()
+    
+    @staticmethod
+    def _fingerprint(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+    
+    def add(self, key: str):
+        self._fingerprints.add(self._fingerprint(key))
+    
+    def __contains__(self, key: str) -> bool:
+        return self._fingerprint(key) in self._fingerprints
+    
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+def _is_homepage_domain(host: str) -> bool:
+    """True if host is a HOMEPAGE_DOMAINS entry or a subdomain of one"""
+    host = host.rsplit(':', 1)[0] if ':' in host else host
+    # Look up each dot-suffix: kinhdoanh.vnexpress.net -> vnexpress.net -> net
+    while host:
+        if host in HOMEPAGE_DOMAINS:
+            return True
+        _, _, host = host.partition('.')
+    return False
+
+@lru_cache(maxsize=2048)
+def _classify(url: str) -> Tuple[str, str]:
+    """
+    Classify URL once as 'homepage', 'article' or 'unknown' (plus its stripped
+    path). Cached - the routers check the same URL for homepage and validity
+    """
     try:
         url_lower = url.lower()
         
-        for pattern in HOMEPAGE_PATTERNS:
-            if re.match(pattern, url_lower):
-                logger.debug(f"Homepage pattern match: {url}")
-                return True
+        if _HOMEPAGE_RE.match(url_lower):
+            logger.debug(f"Homepage pattern match: {url}")
+            return "homepage", ""
         
         parsed = urlparse(url)
         path = parsed.path.strip('/')
         
         if not path or path.count('/') == 0:
             logger.debug(f"Empty or root path: {url}")
-            return True
+            return "homepage", path
+        
+        # Media/documents are never articles - cheap suffix test before any regex
+        if '.' in path[-6:] and path.rsplit('.', 1)[-1].lower() in NON_ARTICLE_EXTENSIONS:
+            logger.debug(f"Non-article asset: {url}")
+            return "unknown", path
         
-        for domain in HOMEPAGE_DOMAINS:
-            if domain in url_lower and len(path) < 20:
-                logger.debug(f"Short path on known domain: {url}")
-                return True
+        if len(path) < 20 and _is_homepage_domain(parsed.netloc.lower()):
+            logger.debug(f"Short path on known domain: {url}")
+            return "homepage", path
         
+        # Tuple form of startswith tests all prefixes in one C call
         if path.startswith(('category/', 'tag/', 'section/', 'archive/')):
             logger.debug(f"Category/tag page: {url}")
-            return True
+            return "homepage", path
+        
+        if _ARTICLE_INDICATOR_RE.search(url_lower):
+            return "article", path
+        
+        if len(path) > 30 and path.count('-') > 2:
+            return "article", path
         
-        return False
+        return "unknown", path
         
     except Exception as e:
-        logger.error(f"Error checking homepage: {e}")
-        return False
+        logger.error(f"Error classifying URL: {e}")
+        return "unknown", ""
 
-def is_valid_article_url(url: str, title: str = "") -> bool:
-    """Check if URL is likely a real article"""
-    if is_homepage_link(url):
-        return False
-    
-    parsed = urlparse(url)
-    path = parsed.path.strip('/')
+def classify_url(url: str) -> str:
+    """Classify URL as 'homepage', 'article' or 'unknown'"""
+    return _classify(url)[0]
+
+def is_homepage_link(url: str) -> bool:
+    """Check if URL is likely a homepage/category page"""
+    return _classify(url)[0] == "homepage"
+
+def classify_article(url: str, title: str = "") -> str:
+    """
+    Full article check in one call: 'homepage', 'article' or 'invalid'
+    (URL classification plus path/title length rules)
+    """
+    kind, path = _classify(url)
+    if kind == "homepage":
+        return "homepage"
     
     if len(path) < 10:
         logger.debug(f"Path too short: {url}")
-        return False
+        return "invalid"
     
     if not title or len(title) < 20:
         logger.debug(f"Title too short: {title}")
-        return False
-    
-    article_indicators = [
-        '.html',
-        '-post-',
-        '/news/',
-        '/article/',
-        '/story/',
-        '/bai-viet/',
-        '/tin-tuc/',
-        r'/\d{4}/\d{2}/\d{2}/',
-        r'/\d{8}/',
-    ]
-    
-    for indicator in article_indicators:
-        if re.search(indicator, url.lower()):
-            return True
-    
-    if len(path) > 30 and path.count('-') > 2:
-        return True
+        return "invalid"
     
-    return False
+    return "article" if kind == "article" else "invalid"
 
+def is_valid_article_url(url: str, title: str = "") -> bool:
+    """Check if URL is likely a real article"""
+    return classify_article(url, title) == "article"
+
+@lru_cache(maxsize=2048)
 def extract_category(url: str, title: str) -> str:
     """
     Extract category from URL or title
     """
-    url_lower = url.lower()
-    title_lower = title.lower()
-    
-    categories = {
-        'stock': ['stock', 'chứng khoán', 'cổ phiếu', 'thị trường', 'vnindex'],
-        'gold': ['gold', 'vàng', 'kim loại'],
-        'crypto': ['crypto', 'bitcoin', 'ethereum', 'blockchain'],
-        'forex': ['forex', 'ngoại hối', 'currency'],
-        'economy': ['economy', 'kinh tế', 'gdp', 'inflation'],
-        'banking': ['bank', 'ngân hàng', 'credit', 'loan']
-    }
-    
-    for category, keywords in categories.items():
-        if any(kw in url_lower or kw in title_lower for kw in keywords):
-            return category
+    # One scan over both haystacks; the lookahead reports overlapping hits so
+    # the earliest-listed category still wins, as with the per-keyword loop
+    haystack = f"{url.lower()}\n{title.lower()}"
+    ranks = {_KEYWORD_TO_CATEGORY[m.group(1)] for m in _CATEGORY_RE.finditer(haystack)}
     
-    return 'general'
+    if not ranks:
+        return 'general'
+    return CATEGORY_ORDER[min(ranks)]
@@ -1,11 +1,23 @@
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from typing import Optional, List, Dict
 import google.generativeai as genai
 from ..config import GOOGLE_API_KEY
+from .summary_cache import summary_key, get_cached_summary, set_cached_summary
 import asyncio
 import time
+import re
+import hashlib
+
+# lxml's C parser is much faster than html.parser; fall back if it's missing
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = 'lxml'
+except ImportError:
+    _HTML_PARSER = 'html.parser'
 
 logger = logging.getLogger(__name__)
 
@@ -15,48 +27,161 @@ genai.configure(api_key=GOOGLE_API_KEY)
 STABLE_MODEL = "gemini-3-flash-preview"
 EXPERIMENTAL_MODEL = "gemini-3-flash-preview"
 
-# ✅ NEW: Track API usage to avoid rate limits
-_last_api_call = 0
-_min_interval = 2  # Minimum 2 seconds between calls
+def _get_requests_session():
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+    })
+    
+    # Keep-alive pool shared by all article fetches (batch summaries fan out)
+    retry_strategy = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=32,
+        pool_maxsize=32
+    )
+    
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    
+    return session
+
+_http_session = _get_requests_session()
+
+class AsyncRateLimiter:
+    """
+    Async token bucket: up to max_rate calls per time_period, refilled
+    continuously. Use as `async with limiter:` around each API call.
+    """
+    
+    def __init__(self, max_rate: float, time_period: float = 60):
+        self.max_rate = max_rate
+        self.rate = max_rate / time_period  # tokens per second
+        self.tokens = max_rate
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.max_rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens go out in arrival order
+        async with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+
+# ✅ Gemini request budget shared by all summarizers (free tier is 30 rpm)
+_gemini_limiter = AsyncRateLimiter(max_rate=25, time_period=60)
+
+# Where the article body usually lives, tried in order: (tag name, attrs) for
+# soup.find - same matches as the old CSS selectors without the selector engine
+_ARTICLE_CONTAINERS = (
+    ('article', {}),
+    (None, {'class': re.compile('article')}),
+    (None, {'class': re.compile('content')}),
+    (None, {'class': re.compile('post-body')}),
+    (None, {'class': re.compile('entry-content')}),
+    ('main', {}),
+)
+
+# Character budget for the article text sent to the model
+MAX_MODEL_CHARS = 8000
+
+def _prepare_model_text(text: str, limit: int = MAX_MODEL_CHARS) -> str:
+    """
+    Trim article text to the model budget: drop repeated paragraphs
+    (captions, share/related boilerplate) and cut on a paragraph boundary
+    instead of mid-sentence
+    """
+    if len(text) <= limit:
+        return text
+    
+    kept = []
+    seen = set()
+    used = 0
+    for paragraph in text.split('\n\n'):
+        if paragraph in seen:
+            continue
+        seen.add(paragraph)
+        
+        sep = 2 if kept else 0
+        if used + sep + len(paragraph) > limit:
+            # Fill the rest of the budget with the head of the overflowing
+            # paragraph so a long body after a short lead isn't dropped
+            room = limit - used - sep
+            if room > 0:
+                kept.append(paragraph[:room])
+            break
+        kept.append(paragraph)
+        used += sep + len(paragraph)
+    
+    return '\n\n'.join(kept)
+
+# Cap on downloaded HTML per article
+MAX_PAGE_BYTES = 2 * 1024 * 1024
 
 def extract_article_text(url: str) -> Optional[str]:
     """Extract full text from article URL"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=15)
-        
-        if response.status_code != 200:
-            return None
+        with _http_session.get(url, timeout=15, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and 'html' not in content_type.lower():
+                logger.warning(f"Not an HTML page ({content_type}): {url[:50]}")
+                return None
+            
+            # Read (decompressed) body up to the cap - ad-heavy pages can be huge
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= MAX_PAGE_BYTES:
+                    logger.debug(f"Page truncated at {MAX_PAGE_BYTES} bytes: {url[:50]}")
+                    break
+            content = b''.join(chunks)
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(content, _HTML_PARSER)
         
+        # Drop page chrome with everything nested in it before looking for text
         for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe']):
             tag.decompose()
         
-        article_selectors = [
-            'article',
-            '[class*="article"]',
-            '[class*="content"]',
-            '[class*="post-body"]',
-            '[class*="entry-content"]',
-            'main',
-        ]
-        
-        article_text = None
-        for selector in article_selectors:
-            article = soup.select_one(selector)
+        # Text of each block in the last matching container; only joined once,
+        # for the container that wins (first with > 500 chars, else the last)
+        texts = None
+        for name, attrs in _ARTICLE_CONTAINERS:
+            article = soup.find(name, attrs=attrs)
             if article:
-                paragraphs = article.find_all(['p', 'h1', 'h2', 'h3'])
-                article_text = '\n\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-                if len(article_text) > 500:
+                texts = [t for t in (p.get_text(strip=True) for p in article.find_all(['p', 'h1', 'h2', 'h3'])) if t]
+                # Length the '\n\n'-joined text would have
+                if sum(map(len, texts)) + 2 * max(len(texts) - 1, 0) > 500:
                     break
         
+        article_text = '\n\n'.join(texts) if texts else None
+        
         if not article_text:
-            paragraphs = soup.find_all('p')
-            article_text = '\n\n'.join([p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 50])
+            article_text = '\n\n'.join([t for t in (p.get_text(strip=True) for p in soup.find_all('p')) if len(t) > 50])
         
         if len(article_text) < 200:
             logger.warning(f"Extracted text too short: {len(article_text)} chars")
@@ -73,20 +198,20 @@ async def summarize_article(url: str, title: str, max_words: int = 500) -> Optio
     """
     ✅ FIXED: Better rate limit handling + fallback to stable model
     """
-    global _last_api_call
-    
     try:
-        # ✅ Rate limit protection
-        time_since_last = time.time() - _last_api_call
-        if time_since_last < _min_interval:
-            await asyncio.sleep(_min_interval - time_since_last)
-        
-        full_text = extract_article_text(url)
+        # requests + BeautifulSoup are blocking - keep them off the event loop
+        full_text = await asyncio.to_thread(extract_article_text, url)
         
         if not full_text:
             logger.warning(f"Could not extract text from {url}")
             return None
         
+        model_text = _prepare_model_text(full_text)
+        cache_key = summary_key(title, model_text)
+        cached = get_cached_summary(cache_key)
+        if cached:
+            return cached
+        
         # ✅ Try stable model first
         try:
             model = genai.GenerativeModel(STABLE_MODEL)
@@ -96,7 +221,7 @@ async def summarize_article(url: str, title: str, max_words: int = 500) -> Optio
 Article Title: {title}
 
 Full Article Text:
-{full_text[:8000]}
+{model_text}
 
 Task: Create a comprehensive summary (300-500 words) that captures:
 1. Main topic/event and its significance
@@ -108,15 +233,14 @@ Task: Create a comprehensive summary (300-500 words) that captures:
 Write in the same language as the article (Vietnamese or English).
 Be objective, factual, and thorough. Use bullet points for clarity when appropriate."""
 
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.2,
-                    "max_output_tokens": 1024,
-                }
-            )
-            
-            _last_api_call = time.time()
+            async with _gemini_limiter:
+                response = await model.generate_content_async(
+                    prompt,
+                    generation_config={
+                        "temperature": 0.2,
+                        "max_output_tokens": 1024,
+                    }
+                )
             
             summary = response.text.strip()
             
@@ -124,6 +248,8 @@ Be objective, factual, and thorough. Use bullet points for clarity when appropri
                 logger.warning("Summary too short")
                 return None
             
+            set_cached_summary(cache_key, summary)
+            
             logger.info(f"✅ Summarized: {title[:50]} ({len(summary)} chars, ~{len(summary.split())} words)")
             return summary
             
@@ -135,7 +261,7 @@ Be objective, factual, and thorough. Use bullet points for clarity when appropri
                 logger.warning(f"⚠️ Rate limit hit, returning snippet instead")
                 
                 # ✅ Fallback: Return first 500 words instead of failing
-                words = full_text.split()[:500]
+                words = full_text.split(None, 500)[:500]  # stop splitting after 500 words
                 fallback = " ".join(words)
                 
                 # Add ellipsis
@@ -158,14 +284,7 @@ async def summarize_article_direct(title: str, content: str, max_words: int = 50
     
     This is for when we already have the content from search results.
     """
-    global _last_api_call
-    
     try:
-        # ✅ Rate limit protection
-        time_since_last = time.time() - _last_api_call
-        if time_since_last < _min_interval:
-            await asyncio.sleep(_min_interval - time_since_last)
-        
         # ✅ CRITICAL: Use provided content directly
         full_text = content
         
@@ -173,6 +292,12 @@ async def summarize_article_direct(title: str, content: str, max_words: int = 50
             logger.warning(f"Content too short: {len(full_text)} chars")
             return None
         
+        model_text = _prepare_model_text(full_text)
+        cache_key = summary_key(title, model_text)
+        cached = get_cached_summary(cache_key)
+        if cached:
+            return cached
+        
         # ✅ Try stable model
         try:
             model = genai.GenerativeModel(STABLE_MODEL)
@@ -182,7 +307,7 @@ async def summarize_article_direct(title: str, content: str, max_words: int = 50
 Article Title: {title}
 
 Article Content:
-{full_text[:8000]}
+{model_text}
 
 Task: Create a comprehensive summary (300-500 words) that captures:
 1. Main topic/event and its significance
@@ -194,15 +319,14 @@ Task: Create a comprehensive summary (300-500 words) that captures:
 Write in the same language as the article (Vietnamese or English).
 Be objective, factual, and thorough. Use bullet points for clarity when appropriate."""
 
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.2,
-                    "max_output_tokens": 1024,
-                }
-            )
-            
-            _last_api_call = time.time()
+            async with _gemini_limiter:
+                response = await model.generate_content_async(
+                    prompt,
+                    generation_config={
+                        "temperature": 0.2,
+                        "max_output_tokens": 1024,
+                    }
+                )
             
             summary = response.text.strip()
             
@@ -210,6 +334,8 @@ Be objective, factual, and thorough. Use bullet points for clarity when appropri
                 logger.warning("Summary too short")
                 return None
             
+            set_cached_summary(cache_key, summary)
+            
             logger.info(f"✅ Summarized: {title[:50]} ({len(summary)} chars)")
             return summary
             
@@ -221,7 +347,7 @@ Be objective, factual, and thorough. Use bullet points for clarity when appropri
                 logger.warning(f"⚠️ Rate limit hit, returning snippet")
                 
                 # Return first 500 words
-                words = full_text.split()[:500]
+                words = full_text.split(None, 500)[:500]  # stop splitting after 500 words
                 fallback = " ".join(words)
                 
                 if len(words) == 500:
@@ -239,27 +365,46 @@ Be objective, factual, and thorough. Use bullet points for clarity when appropri
 async def batch_summarize_articles(articles: List[Dict]) -> List[Optional[str]]:
     """
     Batch summarize multiple articles concurrently (3-5 at a time)
+    
+    Texts are fetched first and grouped by content hash, so duplicate
+    articles (e.g. syndicated wire stories) share one Gemini call.
     """
     try:
         logger.info(f"📦 Batch summarizing {len(articles)} articles...")
         
         semaphore = asyncio.Semaphore(3)
         
-        async def summarize_with_limit(article):
+        async def fetch_with_limit(article):
             async with semaphore:
-                return await summarize_article(
-                    article['url'],
-                    article['title']
-                )
+                return await asyncio.to_thread(extract_article_text, article['url'])
+        
+        texts = await asyncio.gather(*(fetch_with_limit(article) for article in articles), return_exceptions=True)
+        
+        # content hash -> indices of articles with that text
+        groups = {}
+        for i, text in enumerate(texts):
+            if text and not isinstance(text, Exception):
+                digest = hashlib.blake2b(text[:4000].encode(), digest_size=16).digest()
+                groups.setdefault(digest, []).append(i)
+        
+        async def summarize_with_limit(indices):
+            first = indices[0]
+            async with semaphore:
+                return await summarize_article_direct(articles[first]['title'], texts[first])
         
-        tasks = [summarize_with_limit(article) for article in articles]
+        group_indices = list(groups.values())
+        group_summaries = await asyncio.gather(*(summarize_with_limit(indices) for indices in group_indices), return_exceptions=True)
         
-        summaries = await asyncio.gather(*tasks, return_exceptions=True)
+        summaries = [None] * len(articles)
+        for indices, summary in zip(group_indices, group_summaries):
+            if summary and not isinstance(summary, Exception):
+                for i in indices:
+                    summaries[i] = summary
         
-        success_count = sum(1 for s in summaries if s and not isinstance(s, Exception))
-        logger.info(f"✅ Batch summarized: {success_count}/{len(articles)} successful")
+        success_count = sum(1 for s in summaries if s)
+        logger.info(f"✅ Batch summarized: {success_count}/{len(articles)} successful ({len(group_indices)} unique)")
         
-        return [s if s and not isinstance(s, Exception) else None for s in summaries]
+        return summaries
         
     except Exception as e:
         logger.error(f"Error in batch summarization: {e}")
@@ -0,0 +1,62 @@
+"""
+Local cache for article summaries
+- Keyed by a hash of title + the text sent to the model
+- One JSON file per summary, 7 day TTL (same file cache style as EODHD)
+"""
+import logging
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("cache/summaries")
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_TTL = 7 * 86400
+
+# Log hit rate every N lookups
+_STATS_LOG_EVERY = 50
+_stats = {"hits": 0, "misses": 0}
+
+def summary_key(title: str, text: str) -> str:
+    """Cache key for a summary of `text` (only the part the model sees counts)"""
+    return hashlib.sha256(f"{title}\n{text}".encode()).hexdigest()
+
+def _record(hit: bool):
+    _stats["hits" if hit else "misses"] += 1
+    total = _stats["hits"] + _stats["misses"]
+    if total % _STATS_LOG_EVERY == 0:
+        logger.info(f"📊 Summary cache: {_stats['hits']}/{total} hits")
+
+def get_cached_summary(key: str) -> Optional[str]:
+    """Return a cached summary, or None if missing/expired"""
+    cache_path = CACHE_DIR / f"{key}.json"
+    try:
+        if time.time() - cache_path.stat().st_mtime >= CACHE_TTL:
+            cache_path.unlink(missing_ok=True)
+            _record(False)
+            return None
+
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            summary = json.load(f).get("summary")
+
+        _record(bool(summary))
+        return summary
+
+    except FileNotFoundError:
+        _record(False)
+        return None
+    except Exception as e:
+        logger.warning(f"Summary cache read failed: {e}")
+        _record(False)
+        return None
+
+def set_cached_summary(key: str, summary: str):
+    """Store a summary"""
+    try:
+        with open(CACHE_DIR / f"{key}.json", 'w', encoding='utf-8') as f:
+            json.dump({"summary": summary, "ts": time.time()}, f, ensure_ascii=False)
+    except Exception as e:
+        logger.error(f"Summary cache write failed: {e}")
@@ -3,8 +3,14 @@ from datetime import datetime
 import pandas as pd
 import time
 import asyncio
+import random
+import re
 from threading import Lock
-from functools import wraps
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps, lru_cache
+from typing import Optional
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -20,65 +26,97 @@ class VNStockRateLimiter:
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = []  # List of timestamps
+        self.requests = deque()  # Request timestamps, oldest first
         self.lock = Lock()
         self.min_interval = time_window / max_requests  # ~3.33 seconds between requests
     
-    def wait_if_needed(self) -> float:
+    def _expire(self, now: float):
+        """Drop timestamps outside the time window (they're in order, so from the left)"""
+        while self.requests and now - self.requests[0] >= self.time_window:
+            self.requests.popleft()
+    
+    def _reserve(self) -> float:
         """
-        Wait if rate limit would be exceeded.
-        Returns: Time waited in seconds
+        Reserve the next allowed request slot.
+        Returns: Seconds the caller must wait before its request
+        
+        Only bookkeeping happens under the lock - callers sleep outside it,
+        so one over-quota caller doesn't hold up the others' reservations.
         """
         with self.lock:
             now = time.time()
             
             # Remove old requests outside time window
-            self.requests = [t for t in self.requests if now - t < self.time_window]
+            self._expire(now)
             
-            # Check if we need to wait
+            slot = now
+            
+            # Window full: wait until the request max_requests back expires
             if len(self.requests) >= self.max_requests:
-                # Wait until oldest request expires
-                oldest = min(self.requests)
-                wait_time = self.time_window - (now - oldest) + 0.5  # Extra 0.5s buffer
-                
-                if wait_time > 0:
-                    logger.warning(f"⏳ VNStock rate limit: waiting {wait_time:.1f}s...")
-                    time.sleep(wait_time)
-                    now = time.time()
-                    # Clean up again after waiting
-                    self.requests = [t for t in self.requests if now - t < self.time_window]
+                slot = max(slot, self.requests[-self.max_requests] + self.time_window + 0.5)  # Extra 0.5s buffer
             
             # Also enforce minimum interval between requests
             if self.requests:
-                last_request = max(self.requests)
-                time_since_last = now - last_request
-                
-                if time_since_last < self.min_interval:
-                    sleep_time = self.min_interval - time_since_last
-                    time.sleep(sleep_time)
-                    now = time.time()
+                slot = max(slot, self.requests[-1] + self.min_interval)
             
-            # Record this request
-            self.requests.append(now)
+            # Record this request (slots only move forward, so the deque stays sorted)
+            self.requests.append(slot)
             
-            return 0
+            return slot - now
+    
+    def wait_if_needed(self) -> float:
+        """
+        Wait if rate limit would be exceeded.
+        Returns: Time waited in seconds
+        """
+        wait_time = self._reserve()
+        
+        if wait_time > 0:
+            if wait_time > self.min_interval:
+                logger.warning(f"⏳ VNStock rate limit: waiting {wait_time:.1f}s...")
+            time.sleep(wait_time)
+        
+        return max(wait_time, 0)
+    
+    async def wait_if_needed_async(self) -> float:
+        """
+        Same as wait_if_needed, but sleeps without blocking the event loop.
+        Shares the request budget with the sync path.
+        """
+        wait_time = self._reserve()
+        
+        if wait_time > 0:
+            if wait_time > self.min_interval:
+                logger.warning(f"⏳ VNStock rate limit: waiting {wait_time:.1f}s...")
+            await asyncio.sleep(wait_time)
+        
+        return max(wait_time, 0)
     
     def get_status(self) -> dict:
         """Get current rate limit status"""
         with self.lock:
             now = time.time()
-            self.requests = [t for t in self.requests if now - t < self.time_window]
+            self._expire(now)
             
             return {
                 "requests_used": len(self.requests),
                 "requests_remaining": self.max_requests - len(self.requests),
-                "reset_in": self.time_window - (now - min(self.requests)) if self.requests else 0
+                "reset_in": self.time_window - (now - self.requests[0]) if self.requests else 0
             }
 
 
 # Global rate limiter instance
 _rate_limiter = VNStockRateLimiter(max_requests=18, time_window=60)
 
+# Cached responses - a hit costs no rate-limit slot. The symbol catalog barely
+# changes; price boards are reused for a few seconds across callers
+_symbols_cache = TTLCache(maxsize=1, ttl=86400)
+_price_board_cache = TTLCache(maxsize=256, ttl=10)  # frozenset(symbols) -> DataFrame
+_cache_lock = Lock()  # callers run in executor threads
+
+# Fetches in flight at once in fetch_multiple_stocks_safe
+MAX_FETCH_WORKERS = 4
+
 
 def rate_limited(func):
     """Decorator to apply rate limiting to vnstock functions"""
@@ -89,6 +127,33 @@ def rate_limited(func):
     return wrapper
 
 
+def async_rate_limited(func):
+    """Decorator to apply rate limiting to async functions (non-blocking wait)"""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        await _rate_limiter.wait_if_needed_async()
+        return await func(*args, **kwargs)
+    return wrapper
+
+
+# Error messages that mean we were rate limited
+_RATE_LIMIT_ERROR_RE = re.compile(r'rate|limit|429|too many', re.IGNORECASE)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of the error's HTTP response, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        # Missing, or an HTTP-date we don't bother parsing
+        return None
+
+
 def retry_on_error(max_retries: int = 3, delay: float = 5.0):
     """Decorator to retry on error with exponential backoff"""
     def decorator(func):
@@ -101,11 +166,13 @@ def retry_on_error(max_retries: int = 3, delay: float = 5.0):
                     return func(*args, **kwargs)
                 except Exception as e:
                     last_error = e
-                    error_msg = str(e).lower()
                     
                     # Check if it's a rate limit error
-                    if "rate" in error_msg or "limit" in error_msg or "429" in error_msg or "too many" in error_msg:
-                        wait_time = delay * (2 ** attempt)  # Exponential backoff
+                    if _RATE_LIMIT_ERROR_RE.search(str(e)):
+                        # Server's Retry-After if it sent one, else exponential backoff;
+                        # full jitter so workers don't all retry together
+                        wait_time = _retry_after(e) or delay * (2 ** attempt)
+                        wait_time = random.uniform(0, min(wait_time, _rate_limiter.time_window))
                         logger.warning(f"⚠️ VNStock rate limit hit, retry {attempt + 1}/{max_retries} in {wait_time:.1f}s...")
                         time.sleep(wait_time)
                     else:
@@ -120,6 +187,13 @@ def retry_on_error(max_retries: int = 3, delay: float = 5.0):
     return decorator
 
 
+@lru_cache(maxsize=512)
+def _get_stock_client(symbol: str, source: str = 'VCI'):
+    """Vnstock stock client for (symbol, source), built once and reused"""
+    from vnstock import Vnstock
+    return Vnstock().stock(symbol=symbol, source=source)
+
+
 @retry_on_error(max_retries=3, delay=5.0)
 @rate_limited
 def fetch_stock_data(symbol, start_date, end_date, interval='1D'):
@@ -136,12 +210,10 @@ def fetch_stock_data(symbol, start_date, end_date, interval='1D'):
         DataFrame with columns: time/date, open, high, low, close, volume
     """
     try:
-        from vnstock import Vnstock
-        
         logger.info(f"📊 Fetching {symbol} ({start_date} to {end_date}, interval={interval})")
         
-        # ✅ Initialize Vnstock
-        stock = Vnstock().stock(symbol=symbol, source='VCI')
+        # ✅ Reuse the Vnstock client for this symbol
+        stock = _get_stock_client(symbol, 'VCI')
         
         # ✅ Get historical data
         df = stock.quote.history(
@@ -178,6 +250,14 @@ def fetch_stock_data(symbol, start_date, end_date, interval='1D'):
             df['time'] = pd.to_datetime(df['time'])
             df = df.set_index('time')
         
+        # ✅ Compact dtypes: naive datetime64 index, integer volume. Prices stay
+        # float64 - VND prices in thousands (e.g. 23.45) don't survive float32
+        if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        volume = pd.to_numeric(df['volume'], errors='coerce')
+        if volume.notna().all() and (volume % 1 == 0).all():
+            df['volume'] = pd.to_numeric(volume.astype('int64'), downcast='unsigned' if (volume >= 0).all() else 'integer')
+        
         logger.info(f"✓ {symbol}: {len(df)} records (interval={interval})")
         return df
         
@@ -189,9 +269,35 @@ def fetch_stock_data(symbol, start_date, end_date, interval='1D'):
         raise e
 
 
+def get_price_board(symbols):
+    """
+    Get real-time price board (cached for a few seconds per symbol set)
+    
+    Args:
+        symbols: List of stock symbols
+    
+    Returns:
+        DataFrame with real-time prices
+    """
+    if not symbols:
+        return None
+    
+    key = frozenset(symbols)
+    with _cache_lock:
+        cached = _price_board_cache.get(key)
+    if cached is not None:
+        return cached.copy()
+    
+    df = _fetch_price_board(symbols)
+    if df is not None:
+        with _cache_lock:
+            _price_board_cache[key] = df.copy()
+    return df
+
+
 @retry_on_error(max_retries=3, delay=5.0)
 @rate_limited
-def get_price_board(symbols):
+def _fetch_price_board(symbols):
     """
     ✅ RATE LIMITED + RETRY: Get real-time price board
     
@@ -202,15 +308,13 @@ def get_price_board(symbols):
         DataFrame with real-time prices
     """
     try:
-        from vnstock import Vnstock
-        
         if not symbols:
             return None
         
         logger.info(f"📊 Getting price board for {symbols}")
         
-        # ✅ Initialize Vnstock
-        stock = Vnstock().stock(symbol=symbols[0], source='VCI')
+        # ✅ Reuse the Vnstock client (price board covers all symbols)
+        stock = _get_stock_client(symbols[0], 'VCI')
         
         # ✅ Get price board
         df = stock.trading.price_board(symbols)
@@ -247,9 +351,25 @@ def get_price_board(symbols):
         raise e
 
 
+def list_all_symbols():
+    """
+    List all symbols (cached for a day)
+    """
+    with _cache_lock:
+        cached = _symbols_cache.get("all")
+    if cached is not None:
+        return cached.copy()
+    
+    df = _fetch_all_symbols()
+    if df is not None:
+        with _cache_lock:
+            _symbols_cache["all"] = df.copy()
+    return df
+
+
 @retry_on_error(max_retries=2, delay=3.0)
 @rate_limited
-def list_all_symbols():
+def _fetch_all_symbols():
     """
     ✅ RATE LIMITED + RETRY: List all symbols
     """
@@ -285,16 +405,22 @@ def fetch_multiple_stocks_safe(symbols: list, start_date: str, end_date: str, in
     """
     Safely fetch multiple stocks with built-in rate limiting.
     Returns dict of {symbol: DataFrame}
+    
+    Fetches overlap in a small thread pool; the shared rate limiter still
+    spaces out when each request starts.
     """
+    def fetch_one(symbol):
+        try:
+            return symbol, fetch_stock_data(symbol, start_date, end_date, interval)
+        except Exception as e:
+            logger.error(f"Failed to fetch {symbol}: {e}")
+            return symbol, None
+    
     results = {}
     
-    for symbol in symbols:
-        try:
-            df = fetch_stock_data(symbol, start_date, end_date, interval)
+    with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+        for symbol, df in executor.map(fetch_one, symbols):
             if df is not None:
                 results[symbol] = df
-        except Exception as e:
-            logger.error(f"Failed to fetch {symbol}: {e}")
-            continue
     
     return results
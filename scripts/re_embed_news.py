@@ -7,54 +7,92 @@ import asyncio
 import logging
 from pathlib import Path
 
+from sqlalchemy import select, update, func
+
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.database.connection import SessionLocal
 from app.database.models import NewsArticle
-from app.rag.embeddings import create_embedding
+from app.rag.embeddings import create_embedding, get_embedding_model
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows read and written per round-trip
+BATCH_SIZE = 200
+
+# Embeddings computed at once. The model runs locally and create_embedding
+# never awaits, so each one runs in a worker thread (encode releases the GIL)
+EMBED_CONCURRENCY = 4
+
+def _embed_sync(text):
+    return asyncio.run(create_embedding(text))
+
 async def re_embed_all():
     """Re-embed all articles"""
     session = SessionLocal()
     
     try:
-        # Get all articles
-        articles = session.query(NewsArticle).all()
+        total = session.scalar(select(func.count(NewsArticle.id)))
         
-        logger.info(f"📦 Found {len(articles)} articles to re-embed")
+        logger.info(f"📦 Found {total} articles to re-embed")
         
         success = 0
         failed = 0
+        processed = 0
+        last_id = 0
+        semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
         
-        for i, article in enumerate(articles, 1):
-            try:
-                logger.info(f"[{i}/{len(articles)}] Re-embedding: {article.title[:50]}")
-                
-                # Create new embedding
-                text = f"{article.title}\n\n{article.content}"
-                new_embedding = await create_embedding(text)
+        # Load the model up front so worker threads don't race to load it
+        get_embedding_model()
+        
+        # Page through by id (keyset) so only one batch of rows is in memory,
+        # and commits between batches don't invalidate an open cursor
+        while True:
+            rows = session.execute(
+                select(NewsArticle.id, NewsArticle.title, NewsArticle.content)
+                .where(NewsArticle.id > last_id)
+                .order_by(NewsArticle.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            
+            if not rows:
+                break
+            
+            last_id = rows[-1].id
+            
+            async def embed_one(article_id, title, content):
+                async with semaphore:
+                    text = f"{title}\n\n{content}"
+                    return article_id, await asyncio.to_thread(_embed_sync, text)
+            
+            outcomes = await asyncio.gather(
+                *(embed_one(*row) for row in rows), return_exceptions=True
+            )
+            
+            updates = []
+            for (article_id, _, _), outcome in zip(rows, outcomes):
+                processed += 1
+                if isinstance(outcome, Exception):
+                    logger.error(f"❌ Failed to re-embed article {article_id}: {outcome}")
+                    failed += 1
+                    continue
                 
+                new_embedding = outcome[1]
                 if new_embedding and len(new_embedding) == 384:
-                    article.embedding = new_embedding
+                    updates.append({"id": article_id, "embedding": new_embedding})
                     success += 1
                 else:
-                    logger.error(f"❌ Invalid embedding for article {article.id}")
+                    logger.error(f"❌ Invalid embedding for article {article_id}")
                     failed += 1
-                
-                # Commit every 10 articles
-                if i % 10 == 0:
-                    session.commit()
-                    logger.info(f"✅ Committed batch (success={success}, failed={failed})")
-                
-            except Exception as e:
-                logger.error(f"❌ Failed to re-embed article {article.id}: {e}")
-                failed += 1
-        
-        # Final commit
-        session.commit()
+            
+            logger.info(f"[{processed}/{total}] Re-embedded batch ending at id {last_id}")
+            
+            # One executemany UPDATE (by primary key) per batch
+            if updates:
+                session.execute(update(NewsArticle), updates)
+            session.commit()
+            logger.info(f"✅ Committed batch (success={success}, failed={failed})")
         
         logger.info(f"✅ Re-embedding complete!")
         logger.info(f"   Success: {success}")
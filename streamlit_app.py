@@ -1,30 +1,128 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import html
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import json
+import orjson
 import time  # ✅ ADD: Missing import
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 st.set_page_config(page_title="Financial Chatbot", page_icon="📈", layout="wide")
 
 # API Base URL
 API_BASE_URL = os.getenv("API_BASE_URL", "http://api:8000")
 
+@st.cache_resource
+def get_session():
+    """One pooled keep-alive HTTP session for the API, kept across reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+SESSION = get_session()
+
+class _UncachedResponse(Exception):
+    """Raised inside cached fetchers so error responses are never cached"""
+    def __init__(self, status_code, payload):
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.payload = payload
+
+def _get_json(path, params=None, timeout=30):
+    response = SESSION.get(f"{API_BASE_URL}{path}", params=params, timeout=timeout)
+    payload = orjson.loads(response.content) if response.status_code == 200 else None
+    if payload is None or payload.get("success") is False or "error" in (payload.get("data") or {}):
+        raise _UncachedResponse(response.status_code, payload)
+    return payload
+
+# Cached API reads - reruns with unchanged inputs skip the HTTP round-trip
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_gold_prices():
+    return _get_json("/gold/prices")
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_vn_charts(symbols: str, period: str):
+    return _get_json("/stocks/vn/charts", {"symbols": symbols, "period": period}, timeout=30)
+
+# Not cached: the US tab only loads on an explicit Refresh, which always wants
+# fresh data, and the result is kept in session_state between reruns
+def fetch_us_charts(symbols: str, period: str):
+    return _get_json("/stocks/us/charts", {"symbols": symbols, "period": period}, timeout=120)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_news(query: str, max_results: int, days: int = 30):
+    return _get_json("/news/search", {"query": query, "max_results": max_results, "days": days})
+
+def api_call(fetch, *args):
+    """Run a cached fetcher; returns (status_code, payload)"""
+    try:
+        return 200, fetch(*args)
+    except _UncachedResponse as e:
+        return e.status_code, e.payload
+
+# cache_resource, not cache_data: cache_data would unpickle a copy on every hit,
+# and unpickling a go.Figure re-runs the same validation we're trying to skip
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _fig_from_json(fig_json: str):
+    """Parse + validate a Plotly figure once per unique JSON payload (treat as read-only)"""
+    return go.Figure(orjson.loads(fig_json))
+
+def _post_json(path, payload, timeout=120):
+    return SESSION.post(f"{API_BASE_URL}{path}", json=payload, timeout=timeout)
+
+def update_symbols(path, symbols, max_workers=8):
+    """
+    POST one update request per symbol, concurrently.
+    Returns (total records updated, number of successful requests, failed symbols)
+    """
+    records = 0
+    succeeded = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_post_json, path, [symbol]): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+                if response.status_code != 200:
+                    raise RuntimeError(response.status_code)
+                records += orjson.loads(response.content).get('records', 0)
+            except Exception:
+                failed.append(futures[future])
+                continue
+            succeeded += 1
+    return records, succeeded, sorted(failed)
+
 # Sidebar - API Status & Controls
+# Probes at most every 15s no matter how many reruns render the status
+@st.cache_data(ttl=15, show_spinner=False)
+def _health_probe():
+    """Return the /health status code, or None if the API is unreachable"""
+    try:
+        return SESSION.get(f"{API_BASE_URL}/health", timeout=2).status_code
+    except Exception:
+        return None
+
+# Polls on its own timer instead of on every interaction
+@st.fragment(run_every="30s")
+def render_api_status():
+    # Check API health
+    health_status = _health_probe()
+    if health_status == 200:
+        st.success("✓ FastAPI: Connected")
+    elif health_status is not None:
+        st.error("✗ FastAPI: Error")
+    else:
+        st.error("✗ FastAPI: Disconnected")
+
 with st.sidebar:
     st.subheader("⚙️ API Status")
     
-    # Check API health
-    try:
-        health_response = requests.get(f"{API_BASE_URL}/health", timeout=2)
-        if health_response.status_code == 200:
-            st.success("✓ FastAPI: Connected")
-        else:
-            st.error("✗ FastAPI: Error")
-    except:
-        st.error("✗ FastAPI: Disconnected")
+    render_api_status()
     
     st.divider()
     
@@ -34,8 +132,9 @@ with st.sidebar:
     if st.button("🔄 Crawl Gold Prices", use_container_width=True):
         with st.spinner("Fetching gold prices..."):
             try:
-                response = requests.get(f"{API_BASE_URL}/gold/prices")
+                response = SESSION.get(f"{API_BASE_URL}/gold/prices")
                 if response.status_code == 200:
+                    fetch_gold_prices.clear()
                     st.success("✓ Gold prices updated!")
                     st.rerun()
                 else:
@@ -47,14 +146,15 @@ with st.sidebar:
         with st.spinner("Updating VN stocks..."):
             try:
                 symbols = ["VCB", "VHM", "VIC", "HPG", "TCB", "FPT", "MSN", "VNM", "GAS", "SAB"]
-                response = requests.post(
-                    f"{API_BASE_URL}/stocks/vn/update",
-                    json=symbols
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    st.success(f"✓ Updated {data.get('records', 0)} VN stock records")
-                    st.rerun()
+                records, succeeded, failed = update_symbols("/stocks/vn/update", symbols)
+                if succeeded:
+                    st.success(f"✓ Updated {records} VN stock records")
+                    fetch_vn_charts.clear()
+                    if failed:
+                        # No rerun, so the partial failure stays visible
+                        st.warning(f"⚠️ Failed: {', '.join(failed)}")
+                    else:
+                        st.rerun()
                 else:
                     st.error("Failed to update VN stocks")
             except Exception as e:
@@ -64,20 +164,22 @@ with st.sidebar:
         with st.spinner("Updating US stocks..."):
             try:
                 symbols = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "JPM"]
-                response = requests.post(
-                    f"{API_BASE_URL}/stocks/us/update",
-                    json=symbols
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    st.success(f"✓ Updated {data.get('records', 0)} US stock records")
-                    st.rerun()
+                records, succeeded, failed = update_symbols("/stocks/us/update", symbols)
+                if succeeded:
+                    st.success(f"✓ Updated {records} US stock records")
+                    if failed:
+                        # No rerun, so the partial failure stays visible
+                        st.warning(f"⚠️ Failed: {', '.join(failed)}")
+                    else:
+                        st.rerun()
                 else:
                     st.error("Failed to update US stocks")
             except Exception as e:
                 st.error(f"Error: {e}")
 
 # Main UI - Tabs (ADD AI Knowledge tab)
+# Each tab body (except chat, which also writes to the sidebar) is an
+# st.fragment, so its widgets rerun only that tab
 st.title("📊 Financial Chatbot")
 
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
@@ -116,7 +218,7 @@ with tab1:
             with st.spinner("Processing..."):
                 try:
                     # ✅ Send with session ID
-                    response = requests.post(
+                    response = SESSION.post(
                         f"{API_BASE_URL}/chat/message",
                         json={
                             "message": user_input,
@@ -151,7 +253,7 @@ with tab1:
             if st.button("🗑️ Clear Chat", use_container_width=True):
                 try:
                     # Clear on backend
-                    requests.post(
+                    SESSION.post(
                         f"{API_BASE_URL}/chat/clear",
                         params={"session_id": st.session_state.session_id},
                         timeout=5
@@ -169,21 +271,20 @@ with tab1:
             st.metric("Messages", msg_count)
 
 # Tab 2: Gold Prices Visualization
-with tab2:
+@st.fragment
+def render_gold_tab():
     st.markdown("### 💰 Current Gold Prices")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/gold/prices")
-        if response.status_code == 200:
-            gold_data = response.json()["data"]
+        status_code, gold_payload = api_call(fetch_gold_prices)
+        if status_code == 200:
+            gold_data = gold_payload["data"]
             
             # VN Gold Prices
             st.subheader("🇻🇳 Vietnam Gold Prices (VND/gram)")
             vn_gold = gold_data.get("vn", [])
             
             if vn_gold:
-                df_vn = pd.DataFrame(vn_gold)
-                
                 # ✅ Show price for each gold type
                 cols = st.columns(min(len(vn_gold), 3))
                 
@@ -211,7 +312,7 @@ with tab2:
                 # Show table
                 display_cols = ['source', 'type', 'buy_price', 'sell_price', 'location']
                 st.dataframe(
-                    df_vn[display_cols],
+                    [{col: row.get(col) for col in display_cols} for row in vn_gold],
                     use_container_width=True
                 )
                 
@@ -240,16 +341,14 @@ with tab2:
             intl_gold = gold_data.get("international", [])
             
             if intl_gold:
-                df_intl = pd.DataFrame(intl_gold)
-                
                 # Show latest price
-                latest_price = df_intl['price_usd'].iloc[0]
+                latest_price = intl_gold[0]['price_usd']
                 st.metric("Gold Spot Price", f"${latest_price:,.2f}/oz")
                 
                 # Show details
                 display_cols = ['source', 'type', 'price_usd', 'high_24h', 'low_24h', 'open']
                 st.dataframe(
-                    df_intl[display_cols],
+                    [{col: row.get(col) for col in display_cols} for row in intl_gold],
                     use_container_width=True
                 )
             else:
@@ -259,8 +358,15 @@ with tab2:
     except Exception as e:
         st.error(f"Error: {e}")
 
+with tab2:
+    render_gold_tab()
+
+def _mark_vn_dirty():
+    st.session_state.vn_dirty = True
+
 # Tab 3: VN Stocks
-with tab3:
+@st.fragment
+def render_vn_stocks_tab():
     st.markdown("### 📈 Vietnam Stock Market")
     
     col1, col2 = st.columns([3, 1])
@@ -270,7 +376,8 @@ with tab3:
             "Enter stock symbols (comma-separated):", 
             default_symbols,
             help="Example: VCB,VHM,FPT",
-            key="vn_symbols"
+            key="vn_symbols",
+            on_change=_mark_vn_dirty
         )
     with col2:
         # ✅ FIXED: Add 1d and 1w options
@@ -278,7 +385,8 @@ with tab3:
             "Period:", 
             ["1d", "1w", "1mo", "3mo", "6mo", "1y"],  # ✅ More options
             index=2,  # Default to "1mo"
-            key="vn_period"
+            key="vn_period",
+            on_change=_mark_vn_dirty
         )
     
     # ✅ Show info about data granularity
@@ -298,20 +406,18 @@ with tab3:
     if "vn_stocks_loaded" not in st.session_state:
         st.session_state.vn_stocks_loaded = False
     
-    # ✅ IMPORTANT: Only fetch if symbols changed or first load
-    current_vn_symbols = symbols_input.strip().upper()
-    current_vn_period = period
-    
-    # Check if we need to refresh (first load, symbol change, or manual refresh)
+    # ✅ IMPORTANT: Only fetch on first load or after the inputs were committed
+    # (on_change fires on Enter/blur for the text box, on select for the period)
     need_refresh = (
         not st.session_state.vn_stocks_loaded or
-        st.session_state.get("last_vn_symbols") != current_vn_symbols or
-        st.session_state.get("last_vn_period") != current_vn_period
+        st.session_state.get("vn_dirty", False)
     )
     
     manual_refresh = st.button("🔄 Refresh Charts", key="refresh_vn")
     
     if manual_refresh or need_refresh:
+        st.session_state.vn_dirty = False
+        
         # ✅ VALIDATE: Check symbols are not empty
         if not symbols_input or not symbols_input.strip():
             st.error("❌ Please enter at least one stock symbol")
@@ -319,17 +425,12 @@ with tab3:
             try:
                 with st.spinner("Loading stock data and generating charts..."):
                     # ✅ CRITICAL FIX: Send as query param, NOT in URL path
-                    response = requests.get(
-                        f"{API_BASE_URL}/stocks/vn/charts",
-                        params={
-                            "symbols": symbols_input.strip(),  # ✅ Send as param
-                            "period": period
-                        },
-                        timeout=30
-                    )
+                    # ✅ Manual refresh bypasses the UI cache
+                    if manual_refresh:
+                        fetch_vn_charts.clear()
+                    status_code, data = api_call(fetch_vn_charts, symbols_input.strip(), period)
                     
-                    if response.status_code == 200:
-                        data = response.json()
+                    if status_code == 200:
                         
                         if not data.get("success"):
                             st.error(f"❌ {data.get('error', 'Unknown error')}")
@@ -348,10 +449,8 @@ with tab3:
                                 # ✅ Store in session state
                                 st.session_state.vn_chart_data = chart_data
                                 st.session_state.vn_stocks_loaded = True
-                                st.session_state.last_vn_symbols = current_vn_symbols
-                                st.session_state.last_vn_period = current_vn_period
                     else:
-                        st.error(f"API error: {response.status_code}")
+                        st.error(f"API error: {status_code}")
                         st.session_state.vn_chart_data = None
                         
             except Exception as e:
@@ -391,7 +490,7 @@ with tab3:
                 
                 try:
                     fig_json = chart_data['charts']['comparison']
-                    fig = go.Figure(json.loads(fig_json))
+                    fig = _fig_from_json(fig_json)
                     st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.error(f"Chart error: {e}")
@@ -407,7 +506,7 @@ with tab3:
                     if f"{symbol}_candlestick" in chart_data.get("charts", {}):
                         try:
                             fig_json = chart_data['charts'][f'{symbol}_candlestick']
-                            fig = go.Figure(json.loads(fig_json))
+                            fig = _fig_from_json(fig_json)
                             st.plotly_chart(fig, use_container_width=True)
                         except Exception as e:
                             st.error(f"Chart error: {e}")
@@ -416,15 +515,19 @@ with tab3:
                     if f"{symbol}_technical" in chart_data.get("charts", {}):
                         try:
                             fig_json = chart_data['charts'][f'{symbol}_technical']
-                            fig = go.Figure(json.loads(fig_json))
+                            fig = _fig_from_json(fig_json)
                             st.plotly_chart(fig, use_container_width=True)
                         except Exception as e:
                             st.error(f"Chart error: {e}")
                 
                 st.divider()
 
+with tab3:
+    render_vn_stocks_tab()
+
 # ✅ Tab 4: US Stocks - NO AUTO-LOAD (manual refresh only)
-with tab4:
+@st.fragment
+def render_us_stocks_tab():
     st.markdown("### 🇺🇸 US Stock Market")
     
     col1, col2 = st.columns([3, 1])
@@ -455,19 +558,12 @@ with tab4:
                     progress_text = st.empty()
                     progress_text.text("🌐 Connecting to EODHD API...")
                     
-                    response = requests.get(
-                        f"{API_BASE_URL}/stocks/us/charts",
-                        params={
-                            "symbols": us_symbols_input.strip(),
-                            "period": us_period
-                        },
-                        timeout=120  # ✅ CRITICAL: 60→120 seconds timeout
-                    )
+                    # ✅ 120s timeout
+                    status_code, data = api_call(fetch_us_charts, us_symbols_input.strip(), us_period)
                     
                     progress_text.text("📊 Processing data...")
                     
-                    if response.status_code == 200:
-                        data = response.json()
+                    if status_code == 200:
                         
                         if not data.get("success"):
                             st.error(f"❌ {data.get('error', 'Unknown error')}")
@@ -489,7 +585,7 @@ with tab4:
                                 time.sleep(1)
                                 progress_text.empty()
                     else:
-                        st.error(f"API error: {response.status_code}")
+                        st.error(f"API error: {status_code}")
                         st.session_state.us_chart_data = None
                         
             except requests.exceptions.Timeout:
@@ -525,7 +621,7 @@ with tab4:
                 
                 try:
                     fig_json = chart_data['charts']['comparison']
-                    fig = go.Figure(json.loads(fig_json))
+                    fig = _fig_from_json(fig_json)
                     st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.error(f"Chart error: {e}")
@@ -541,7 +637,7 @@ with tab4:
                     if f"{symbol}_candlestick" in chart_data.get("charts", {}):
                         try:
                             fig_json = chart_data['charts'][f'{symbol}_candlestick']
-                            fig = go.Figure(json.loads(fig_json))
+                            fig = _fig_from_json(fig_json)
                             st.plotly_chart(fig, use_container_width=True)
                         except Exception as e:
                             st.error(f"Chart error: {e}")
@@ -550,7 +646,7 @@ with tab4:
                     if f"{symbol}_technical" in chart_data.get("charts", {}):
                         try:
                             fig_json = chart_data['charts'][f'{symbol}_technical']
-                            fig = go.Figure(json.loads(fig_json))
+                            fig = _fig_from_json(fig_json)
                             st.plotly_chart(fig, use_container_width=True)
                         except Exception as e:
                             st.error(f"Chart error: {e}")
@@ -582,58 +678,92 @@ with tab4:
             - Cache expires: 24 hours
             """)
 
+with tab4:
+    render_us_stocks_tab()
+
+# Newspaper-style card CSS for the news tab. Emitted once per full script run
+# at top level, so news fragment reruns (search, summary/embed buttons) don't
+# resend it
+_NEWS_CSS = "<style>" + " ".join("""
+.news-card {
+    background-color: #f8f9fa;
+    border: 1px solid #dee2e6;
+    border-radius: 8px;
+    padding: 20px;
+    margin-bottom: 20px;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    transition: box-shadow 0.3s ease;
+}
+.news-card:hover {
+    box-shadow: 0 4px 8px rgba(0,0,0,0.15);
+}
+.news-title {
+    font-size: 1.3rem;
+    font-weight: 600;
+    color: #1a1a1a;
+    margin-bottom: 12px;
+    line-height: 1.4;
+}
+.news-meta {
+    display: flex;
+    gap: 20px;
+    margin-bottom: 15px;
+    font-size: 0.85rem;
+    color: #6c757d;
+}
+.news-meta-item {
+    display: flex;
+    align-items: center;
+    gap: 5px;
+}
+.news-summary {
+    font-size: 0.95rem;
+    line-height: 1.6;
+    color: #333;
+    margin-bottom: 15px;
+    border-left: 3px solid #007bff;
+    padding-left: 15px;
+    background-color: #f1f8ff;
+    padding: 12px 15px;
+    border-radius: 4px;
+}
+""".split()) + "</style>"
+
+def _news_card_html(idx, article):
+    """HTML for one news card (title, date/source, snippet, link)"""
+    try:
+        pub_date = datetime.fromisoformat(article['published_date'].replace('Z', '+00:00'))
+        date_str = pub_date.strftime('%d/%m/%Y')
+        time_str = pub_date.strftime('%H:%M')
+    except:
+        date_str = "N/A"
+        time_str = ""
+    
+    return f"""
+    <div class="news-card">
+        <div class="news-title">
+            {idx+1}. {html.escape(article['title'])}
+        </div>
+        <div class="news-meta">
+            <div class="news-meta-item">
+                📅 <strong>{date_str}</strong> {time_str}
+            </div>
+            <div class="news-meta-item">
+                📰 <strong>Source:</strong> {html.escape(article['source'])}
+            </div>
+        </div>
+        <div class="news-summary">
+            {html.escape(article['snippet'])}
+        </div>
+        <a href="{html.escape(article['url'], quote=True)}" target="_blank">🔗 Read Full Article</a>
+    </div>
+    """
+
 # Tab 5: News - SIMPLIFIED (no crawl button)
-with tab5:
+@st.fragment
+def render_news_tab():
     st.markdown("### 📰 Financial News Search")
     
-    # Custom CSS for newspaper-style cards
-    st.markdown("""
-    <style>
-    .news-card {
-        background-color: #f8f9fa;
-        border: 1px solid #dee2e6;
-        border-radius: 8px;
-        padding: 20px;
-        margin-bottom: 20px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        transition: box-shadow 0.3s ease;
-    }
-    .news-card:hover {
-        box-shadow: 0 4px 8px rgba(0,0,0,0.15);
-    }
-    .news-title {
-        font-size: 1.3rem;
-        font-weight: 600;
-        color: #1a1a1a;
-        margin-bottom: 12px;
-        line-height: 1.4;
-    }
-    .news-meta {
-        display: flex;
-        gap: 20px;
-        margin-bottom: 15px;
-        font-size: 0.85rem;
-        color: #6c757d;
-    }
-    .news-meta-item {
-        display: flex;
-        align-items: center;
-        gap: 5px;
-    }
-    .news-summary {
-        font-size: 0.95rem;
-        line-height: 1.6;
-        color: #333;
-        margin-bottom: 15px;
-        border-left: 3px solid #007bff;
-        padding-left: 15px;
-        background-color: #f1f8ff;
-        padding: 12px 15px;
-        border-radius: 4px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
     col1, col2 = st.columns([4, 1])
     with col1:
         search_query = st.text_input(
@@ -647,17 +777,9 @@ with tab5:
     if search_query:
         try:
             with st.spinner("Searching news..."):
-                response = requests.get(
-                    f"{API_BASE_URL}/news/search",
-                    params={
-                        "query": search_query,
-                        "max_results": max_results,
-                        "days": 30
-                    }
-                )
+                status_code, data = api_call(fetch_news, search_query, max_results, 30)
                 
-                if response.status_code == 200 and response.json().get("success"):
-                    data = response.json()
+                if status_code == 200 and data.get("success"):
                     articles = data.get("results", [])
                     
                     if not articles:
@@ -666,107 +788,78 @@ with tab5:
                         st.success(f"✅ Found {len(articles)} articles")
                         st.divider()
                         
+                        # All cards go out as one markdown element (one frontend
+                        # message/DOM patch); only the actions are widgets
+                        st.markdown(
+                            "\n".join(_news_card_html(idx, article) for idx, article in enumerate(articles)),
+                            unsafe_allow_html=True
+                        )
+                        
+                        st.markdown("#### ⚡ Actions")
                         for idx, article in enumerate(articles):
-                            # Parse date
-                            try:
-                                pub_date = datetime.fromisoformat(article['published_date'].replace('Z', '+00:00'))
-                                date_str = pub_date.strftime('%d/%m/%Y')
-                                time_str = pub_date.strftime('%H:%M')
-                            except:
-                                date_str = "N/A"
-                                time_str = ""
+                            col_label, col_summary, col_embed = st.columns([3, 2, 1])
                             
-                            with st.container():
-                                # Card HTML
-                                st.markdown(f"""
-                                <div class="news-card">
-                                    <div class="news-title">
-                                        {idx+1}. {article['title']}
-                                    </div>
-                                    <div class="news-meta">
-                                        <div class="news-meta-item">
-                                            📅 <strong>{date_str}</strong> {time_str}
-                                        </div>
-                                        <div class="news-meta-item">
-                                            📰 <strong>Source:</strong> {article['source']}
-                                        </div>
-                                    </div>
-                                    <div class="news-summary">
-                                        {article['snippet']}
-                                    </div>
-                                </div>
-                                """, unsafe_allow_html=True)
-                                
-                                # ✅ NEW: 3-column layout for actions
-                                col_link, col_summary, col_embed = st.columns([2, 2, 1])
-                                
-                                with col_link:
-                                    st.link_button(
-                                        "🔗 Read Full Article", 
-                                        article['url'], 
-                                        use_container_width=True
-                                    )
-                                
-                                with col_summary:
-                                    # ✅ NEW: Show AI summary button
-                                    if st.button(f"🤖 AI Summary", key=f"summary_{article['id']}", use_container_width=True):
-                                        with st.spinner("Generating summary..."):
-                                            try:
-                                                # ✅ Call summarization endpoint
-                                                summary_response = requests.post(
-                                                    f"{API_BASE_URL}/news/article/summarize",
-                                                    json={
-                                                        "url": article['url'],
-                                                        "title": article['title'],
-                                                        "content": article.get('full_content', article['snippet'])
-                                                    },
-                                                    timeout=30
-                                                )
+                            with col_label:
+                                st.markdown(f"**{idx+1}.** {article['title'][:60]}")
+                            
+                            with col_summary:
+                                # ✅ NEW: Show AI summary button
+                                if st.button(f"🤖 AI Summary", key=f"summary_{article['id']}", use_container_width=True):
+                                    with st.spinner("Generating summary..."):
+                                        try:
+                                            # ✅ Call summarization endpoint
+                                            summary_response = SESSION.post(
+                                                f"{API_BASE_URL}/news/article/summarize",
+                                                json={
+                                                    "url": article['url'],
+                                                    "title": article['title'],
+                                                    "content": article.get('full_content', article['snippet'])
+                                                },
+                                                timeout=30
+                                            )
+                                            
+                                            if summary_response.status_code == 200:
+                                                summary_data = summary_response.json()
                                                 
-                                                if summary_response.status_code == 200:
-                                                    summary_data = summary_response.json()
-                                                    
-                                                    if summary_data.get("success"):
-                                                        # ✅ Show summary in expander
-                                                        with st.expander("📄 AI-Generated Summary", expanded=True):
-                                                            st.markdown(summary_data.get("summary", ""))
-                                                            st.caption(f"Summarized by Gemini AI • {len(summary_data.get('summary', '').split())} words")
-                                                    else:
-                                                        st.error("Failed to generate summary")
+                                                if summary_data.get("success"):
+                                                    # ✅ Show summary in expander
+                                                    with st.expander("📄 AI-Generated Summary", expanded=True):
+                                                        st.markdown(summary_data.get("summary", ""))
+                                                        st.caption(f"Summarized by Gemini AI • {len(summary_data.get('summary', '').split())} words")
                                                 else:
-                                                    st.error("Summary service unavailable")
-                                            except Exception as e:
-                                                st.error(f"Error: {e}")
-                                
-                                with col_embed:
-                                    # ✅ NEW: Manual embed button
-                                    if st.button("💾", key=f"embed_{article['id']}", use_container_width=True, help="Add to Knowledge Base"):
-                                        with st.spinner("Embedding..."):
-                                            try:
-                                                embed_response = requests.post(
-                                                    f"{API_BASE_URL}/news/article/embed",
-                                                    json={
-                                                        "url": article['url'],
-                                                        "title": article['title'],
-                                                        "content": article.get('full_content', article['snippet']),
-                                                        "source": article['source'],
-                                                        "category": article.get('category', 'general')
-                                                    },
-                                                    timeout=60
-                                                )
-                                                
-                                                if embed_response.status_code == 200:
-                                                    embed_data = embed_response.json()
-                                                    if embed_data.get("success"):
-                                                        st.success("✅ Added to Knowledge Base!")
-                                                    else:
-                                                        st.warning(embed_data.get("message", "Already in database"))
+                                                    st.error("Failed to generate summary")
+                                            else:
+                                                st.error("Summary service unavailable")
+                                        except Exception as e:
+                                            st.error(f"Error: {e}")
+                            
+                            with col_embed:
+                                # ✅ NEW: Manual embed button
+                                if st.button("💾", key=f"embed_{article['id']}", use_container_width=True, help="Add to Knowledge Base"):
+                                    with st.spinner("Embedding..."):
+                                        try:
+                                            embed_response = SESSION.post(
+                                                f"{API_BASE_URL}/news/article/embed",
+                                                json={
+                                                    "url": article['url'],
+                                                    "title": article['title'],
+                                                    "content": article.get('full_content', article['snippet']),
+                                                    "source": article['source'],
+                                                    "category": article.get('category', 'general')
+                                                },
+                                                timeout=60
+                                            )
+                                            
+                                            if embed_response.status_code == 200:
+                                                embed_data = embed_response.json()
+                                                if embed_data.get("success"):
+                                                    st.success("✅ Added to Knowledge Base!")
                                                 else:
-                                                    st.error("Failed to embed")
-                                            except Exception as e:
-                                                st.error(f"Error: {e}")
-                                
-                                st.markdown("<br>", unsafe_allow_html=True)
+                                                    st.warning(embed_data.get("message", "Already in database"))
+                                            else:
+                                                st.error("Failed to embed")
+                                        except Exception as e:
+                                            st.error(f"Error: {e}")
                 else:
                     st.error("Failed to search news")
         except Exception as e:
@@ -809,7 +902,7 @@ with tab5:
         st.subheader("📊 Search Statistics")
         
         try:
-            cache_response = requests.get(f"{API_BASE_URL}/news/cache/stats")
+            cache_response = SESSION.get(f"{API_BASE_URL}/news/cache/stats")
             if cache_response.status_code == 200:
                 stats = cache_response.json().get("stats", {})
                 col1, col2, col3 = st.columns(3)
@@ -822,8 +915,13 @@ with tab5:
         except:
             pass
 
+with tab5:
+    st.markdown(_NEWS_CSS, unsafe_allow_html=True)
+    render_news_tab()
+
 # ✅ NEW: Tab 6 - AI Knowledge Base
-with tab6:
+@st.fragment
+def render_knowledge_tab():
     st.markdown("### 🧠 AI Knowledge Base")
     st.caption("View what data the AI has learned from")
     
@@ -831,7 +929,7 @@ with tab6:
     st.subheader("📊 Knowledge Statistics")
     
     try:
-        news_response = requests.get(f"{API_BASE_URL}/knowledge/stats")
+        news_response = SESSION.get(f"{API_BASE_URL}/knowledge/stats")
         
         if news_response.status_code == 200:
             stats = news_response.json()
@@ -869,7 +967,7 @@ with tab6:
             # ✅ NEW: Show recent gold prices
             st.subheader("💰 Recent Gold Price Records")
             
-            gold_response = requests.get(f"{API_BASE_URL}/knowledge/recent-gold?limit=10")
+            gold_response = SESSION.get(f"{API_BASE_URL}/knowledge/recent-gold?limit=10")
             
             if gold_response.status_code == 200:
                 gold_data = gold_response.json().get("gold_prices", [])
@@ -898,7 +996,7 @@ with tab6:
             # Recent News in Knowledge Base
             st.subheader("📚 Recent News Articles in Knowledge Base")
             
-            recent_response = requests.get(f"{API_BASE_URL}/knowledge/recent-news?limit=20")
+            recent_response = SESSION.get(f"{API_BASE_URL}/knowledge/recent-news?limit=20")
             
             if recent_response.status_code == 200:
                 recent_news = recent_response.json().get("articles", [])
@@ -942,7 +1040,7 @@ with tab6:
             if st.button("🔍 Search Knowledge Base"):
                 if test_query:
                     with st.spinner("Searching..."):
-                        search_response = requests.get(
+                        search_response = SESSION.get(
                             f"{API_BASE_URL}/knowledge/search",
                             params={"query": test_query, "top_k": 5}
                         )
@@ -968,6 +1066,9 @@ with tab6:
     except Exception as e:
         st.error(f"Error: {e}")
 
+with tab6:
+    render_knowledge_tab()
+
 # Footer
 st.divider()
 st.caption("💡 Tip: Use the sidebar to update data, then explore visualizations in each tab")
\ No newline at end of file
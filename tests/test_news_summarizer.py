@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("google.generativeai")
+
+from app.utils import news_summarizer
+
+ARTICLE_BODY = "Gold prices rose sharply on Monday as investors sought safe havens. " * 10
+NAV_TEXT = "Home | Markets | Gold | Stocks | Subscribe to our newsletter for daily updates"
+
+PAGE = f"""
+<html>
+<head><title>Gold</title><style>p {{ color: red; }}</style></head>
+<body>
+    <nav><p>{NAV_TEXT}</p></nav>
+    <div id="story"><p>{ARTICLE_BODY}</p></div>
+    <footer><p>{NAV_TEXT}</p></footer>
+</body>
+</html>
+"""
+
+
+class _FakeResponse:
+    status_code = 200
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), chunk_size):
+            yield self._body[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_extract_article_text_skips_page_chrome(monkeypatch):
+    monkeypatch.setattr(
+        news_summarizer._http_session, "get",
+        lambda url, **kwargs: _FakeResponse(PAGE.encode())
+    )
+
+    text = news_summarizer.extract_article_text("https://example.com/news/gold-prices-rise")
+
+    assert text is not None
+    assert "Gold prices rose sharply" in text
+    assert NAV_TEXT not in text